@@ -0,0 +1,81 @@
+"""Tokens and wall time: /explain/all vs five sequential /explain calls.
+
+Runs the real app and a mock upstream on localhost. For each of ``--topics``
+fresh topics it fetches every complexity level twice: once as one
+``/explain`` call per level, one after another (what the frontend does when a
+user clicks through the levels), and once as a single ``/explain/all``. The
+mock charges prompt tokens by length and sleeps ``--latency`` plus
+``--token-latency`` per generated token, so both the repeated prompt and the
+per-call round trip show up in the numbers.
+
+    python benchmarks/bench_all_levels.py --topics 5 --latency 0.4 --token-latency 0.005
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mock_upstream import create_mock_app, serve_in_thread  # noqa: E402
+
+UPSTREAM_PORT = 8903
+APP_PORT = 8904
+
+
+async def measure(mock, run, topics):
+    calls, tokens = mock.state.calls, mock.state.tokens
+    start = time.perf_counter()
+    for topic in topics:
+        await run(topic)
+    wall = (time.perf_counter() - start) / len(topics)
+    return (mock.state.calls - calls) / len(topics), (mock.state.tokens - tokens) / len(topics), wall
+
+
+async def main(args, mock, levels):
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=120) as client:
+        async def sequential(topic):
+            for level in levels:
+                response = await client.post("/explain", json={"topic": topic, "complexity": level})
+                response.raise_for_status()
+
+        async def combined(topic):
+            response = await client.post("/explain/all", json={"topic": topic})
+            response.raise_for_status()
+
+        print(f"{len(levels)} levels, {args.topics} topics, latency {args.latency}s "
+              f"+ {args.token_latency * 1000:.1f}ms/token\n")
+        print(f"{'mode':<18} {'calls':>6} {'tokens':>8} {'wall s':>8}")
+        results = {}
+        for name, run in [("5 x /explain", sequential), ("/explain/all", combined)]:
+            # Distinct topics per mode so neither is served from the cache.
+            topics = [f"{name} benchmark topic {i}" for i in range(args.topics)]
+            results[name] = await measure(mock, run, topics)
+            calls, tokens, wall = results[name]
+            print(f"{name:<18} {calls:>6.1f} {tokens:>8.0f} {wall:>8.2f}")
+
+        (_, seq_tokens, seq_wall), (_, all_tokens, all_wall) = results.values()
+        print(f"\n/explain/all uses {1 - all_tokens / seq_tokens:.0%} fewer tokens "
+              f"and {1 - all_wall / seq_wall:.0%} less wall time per topic")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.4, help="mock round trip in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.005,
+                        help="mock generation time per completion token in seconds")
+    args = parser.parse_args()
+
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{UPSTREAM_PORT}/v1"
+    import main as eli5  # noqa: E402  (reads the environment at import time)
+    import prompts  # noqa: E402
+
+    mock = create_mock_app(args.latency, args.token_latency)
+    serve_in_thread(mock, UPSTREAM_PORT)
+    serve_in_thread(eli5.app, APP_PORT)
+    asyncio.run(main(args, mock, list(prompts.complexity_configs)))
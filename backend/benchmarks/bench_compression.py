@@ -0,0 +1,99 @@
+"""Bytes per entry, hit latency and entries per GB for cache compression modes.
+
+    python benchmarks/bench_compression.py [corpus]
+
+``corpus`` is a cache snapshot or a text file with one explanation per line.
+Without one, a synthetic corpus in the style of our answers is generated;
+real answers from a snapshot give the numbers that matter. The dictionary is
+trained on 80% of the corpus and measured on the other 20%.
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cache import CacheEntry, MemoryCache  # noqa: E402
+from cache.compression import Codec, load_samples, train_dictionary  # noqa: E402
+
+GB = 1024 ** 3
+
+_OPENERS = [
+    "Imagine you have a {thing}.", "Think of {topic} like a {thing}.",
+    "{Topic} is a process that helps {who} {verb}.", "In simple terms, {topic} is how {who} {verb}.",
+    "At its core, {topic} describes how {who} {verb}.",
+]
+_MIDDLES = [
+    "This means that {who} can {verb} without needing a {thing}.",
+    "For example, when you {verb}, you are using the same idea.",
+    "Scientists study {topic} because it explains why {who} {verb}.",
+    "The key idea is that energy and information move from one place to another.",
+    "It works a bit like a {thing} that keeps track of everything.",
+    "Over time, small changes add up and make a big difference.",
+]
+_CLOSERS = [
+    "So next time you see a {thing}, remember {topic}!", "That is why {topic} matters in everyday life.",
+    "In short, {topic} is all about how {who} {verb}.",
+]
+_TOPICS = ["photosynthesis", "blockchain", "gravity", "inflation", "vaccines", "black holes",
+           "machine learning", "the internet", "DNA", "climate change", "relativity", "recursion"]
+_THINGS = ["recipe book", "piggy bank", "team of helpers", "giant library", "treasure map", "puzzle"]
+_WHO = ["plants", "computers", "people", "cells", "scientists", "banks"]
+_VERBS = ["share information", "store energy", "solve problems", "grow and change", "keep things safe"]
+
+
+def synthetic_corpus(n=4_000, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        topic = rng.choice(_TOPICS)
+        fill = dict(topic=topic, Topic=topic.capitalize(), thing=rng.choice(_THINGS),
+                    who=rng.choice(_WHO), verb=rng.choice(_VERBS))
+        first = [rng.choice(_OPENERS)] + rng.sample(_MIDDLES, 2)
+        second = rng.sample(_MIDDLES, 2) + [rng.choice(_CLOSERS)]
+        corpus.append(" ".join(first).format(**fill) + "\n\n" + " ".join(second).format(**fill))
+    return corpus
+
+
+async def measure(codec, texts):
+    cache = MemoryCache(max_entries=len(texts) + 1, max_bytes=GB, codec=codec, train_after=10 ** 9)
+    keys = []
+    for i, text in enumerate(texts):
+        key = f"eli5:bench:{i}"
+        await cache.set(key, CacheEntry(f"topic {i}", "eli5", text, 150, "bench"))
+        keys.append(key)
+    rounds = 5
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            await cache.get(key)
+    hit_us = (time.perf_counter() - start) / (rounds * len(keys)) * 1e6
+    return cache.bytes / len(texts), hit_us
+
+
+async def main(path):
+    corpus = load_samples(path, limit=20_000) if path else synthetic_corpus()
+    random.Random(1).shuffle(corpus)
+    split = int(len(corpus) * 0.8)
+    train, test = corpus[:split], corpus[split:]
+
+    started = time.perf_counter()
+    dictionary = train_dictionary(train)
+    train_s = time.perf_counter() - started
+
+    print(f"corpus: {'synthetic' if not path else path}, {len(train)} train / {len(test)} test entries, "
+          f"avg {sum(map(len, test)) / len(test):.0f} chars")
+    print(f"dictionary: {len(dictionary)} bytes, trained in {train_s:.2f}s\n")
+    print(f"{'mode':<10} {'bytes/entry':>12} {'hit µs':>8} {'entries/GB':>12} {'gain':>7}")
+    baseline = None
+    for name, codec in [("none", None), ("zlib", Codec("zlib")), ("dict", Codec("dict", dictionary))]:
+        per_entry, hit_us = await measure(codec, test)
+        per_gb = GB / per_entry
+        baseline = baseline or per_gb
+        print(f"{name:<10} {per_entry:>12.0f} {hit_us:>8.1f} {per_gb:>12,.0f} {per_gb / baseline:>6.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,78 @@
+"""Throughput of /explain as the number of concurrent clients grows.
+
+Runs the real app and a mock upstream on localhost, then fires batches of
+concurrent requests at /explain. With a non-blocking upstream client the
+wall time per batch stays close to one upstream round trip, so requests/s
+should scale roughly linearly with concurrency.
+
+Pass ``--topics N`` to spread each batch over only N distinct topics; this
+simulates a trending (hot-key) topic and shows how many upstream calls
+request coalescing saved.
+
+    python benchmarks/bench_concurrency.py --latency 1.0 --levels 1 10 50 100 200
+    python benchmarks/bench_concurrency.py --levels 100 --topics 1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mock_upstream import create_mock_app, serve_in_thread  # noqa: E402
+
+UPSTREAM_PORT = 8901
+APP_PORT = 8902
+
+
+async def run_level(client, concurrency, topics):
+    async def one(i):
+        topic = f"benchmark topic {concurrency}-{i % topics if topics else i}"
+        start = time.perf_counter()
+        response = await client.post("/explain", json={"topic": topic, "complexity": "eli5"})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(concurrency)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    return wall, statistics.median(latencies), p95
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=120
+    ) as client:
+        print(f"{'clients':>8} {'wall s':>8} {'req/s':>8} {'p50 s':>8} {'p95 s':>8}")
+        for concurrency in args.levels:
+            wall, p50, p95 = await run_level(client, concurrency, args.topics)
+            print(f"{concurrency:>8} {wall:>8.2f} {concurrency / wall:>8.1f} {p50:>8.2f} {p95:>8.2f}")
+
+        stats = (await client.get("/health")).json()["coalescing"]
+        print(
+            f"\nupstream calls: {stats['upstream_calls']}  coalesced: {stats['coalesced']}  "
+            f"ratio: {stats['coalescing_ratio']:.2%}  tokens saved: {stats['tokens_saved']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=1.0, help="mock upstream latency in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--topics", type=int, default=0, help="distinct topics per batch (0 = all unique)")
+    args = parser.parse_args()
+
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{UPSTREAM_PORT}/v1"
+    import main as eli5  # noqa: E402  (reads the environment at import time)
+
+    serve_in_thread(create_mock_app(args.latency), UPSTREAM_PORT)
+    serve_in_thread(eli5.app, APP_PORT)
+    asyncio.run(main(args))
@@ -0,0 +1,99 @@
+"""Dollars saved per GB of cache for each eviction policy and admission filter.
+
+    python benchmarks/bench_eviction.py [--requests N] [--catalog N] [--skew S]
+
+Replays a Zipfian stream of (topic, level) requests through MemoryCache at a
+few byte budgets. A hit saves the ``tokens_used`` the answer cost to
+generate; a miss stores a fresh answer. Levels differ in answer length the
+same way ``prompts.complexity_configs`` do, so entries differ in both size and
+cost — which is exactly what GDSF weighs and LRU ignores — and most keys are
+requested once, which is what the TinyLFU admission filter screens out.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import prompts  # noqa: E402
+from cache import CacheEntry, MemoryCache  # noqa: E402
+from cache.entry import ENTRY_OVERHEAD_BYTES  # noqa: E402
+from upstream import COST_PER_TOKEN  # noqa: E402
+from warmer import PROMPT_TOKEN_ESTIMATE  # noqa: E402
+
+GB = 1024 ** 3
+CHARS_PER_TOKEN = 4.5
+
+
+def build_catalog(size, seed):
+    """``(key, tokens_used, text)`` for each distinct request, most popular first."""
+    rng = random.Random(seed)
+    levels = list(prompts.complexity_configs)
+    catalog = []
+    for i in range(size):
+        level = rng.choice(levels)
+        max_tokens = prompts.complexity_configs[level]["max_tokens"]
+        completion = int(max_tokens * rng.uniform(0.35, 1.0))
+        text = "x" * int(completion * CHARS_PER_TOKEN)
+        catalog.append((f"{level}:bench:topic-{i}", PROMPT_TOKEN_ESTIMATE + completion, text))
+    return catalog
+
+
+def zipf_stream(catalog, requests, skew, seed):
+    weights = [1 / (rank + 1) ** skew for rank in range(len(catalog))]
+    return random.Random(seed).choices(catalog, weights=weights, k=requests)
+
+
+CONFIGS = [("lru", None), ("gdsf", None), ("lru", "tinylfu"), ("gdsf", "tinylfu")]
+
+
+async def replay(stream, policy, admission, max_bytes, max_entries):
+    cache = MemoryCache(max_entries=max_entries, max_bytes=max_bytes, ttl=10 ** 9,
+                        policy=policy, admission=admission)
+    saved_tokens = 0
+    for key, tokens_used, text in stream:
+        entry = await cache.get(key)
+        if entry is not None:
+            saved_tokens += entry.tokens_used
+        else:
+            await cache.set(key, CacheEntry(key, key.split(":")[0], text, tokens_used, "bench"))
+    return cache.stats(), saved_tokens * COST_PER_TOKEN
+
+
+async def main(args):
+    catalog = build_catalog(args.catalog, args.seed)
+    stream = zipf_stream(catalog, args.requests, args.skew, args.seed + 1)
+    working_set = sum(len(text) + len(key) + ENTRY_OVERHEAD_BYTES for key, _, text in catalog)
+    print(f"{args.requests:,} requests over {args.catalog:,} answers (zipf s={args.skew}), "
+          f"working set {working_set / 1024 ** 2:.1f} MiB\n")
+    print(f"{'cache':>6} {'policy':<13} {'hit ratio':>9} {'$ saved':>9} {'$ / GB':>10} "
+          f"{'vs lru':>7} {'sketch':>7} {'secs':>6}")
+    for fraction in args.fractions:
+        max_bytes = int(working_set * fraction)
+        # The sketch is sized from the entry limit, so give it a realistic one.
+        max_entries = int(args.catalog * fraction)
+        baseline = None
+        for policy, admission in CONFIGS:
+            started = time.perf_counter()
+            stats, dollars = await replay(stream, policy, admission, max_bytes, max_entries)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or dollars
+            label = policy + (f"+{admission}" if admission else "")
+            sketch = f"{stats['sketch_bytes'] / 1024:.0f}K" if admission else "-"
+            print(f"{fraction:>6.0%} {label:<13} {stats['hit_ratio']:>9.3f} {dollars:>9.2f} "
+                  f"{dollars / (max_bytes / GB):>10,.0f} {dollars / baseline:>6.2f}x "
+                  f"{sketch:>7} {elapsed:>6.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500_000)
+    parser.add_argument("--catalog", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=0.9)
+    parser.add_argument("--fractions", type=float, nargs="+", default=[0.02, 0.05, 0.1, 0.25],
+                        help="cache size as a fraction of the working set")
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,44 @@
+"""Per-call cost of topic normalization and how much it collapses a topic log.
+
+    python benchmarks/bench_normalize.py [topics.txt]
+
+The topic file holds one raw topic per line, as users typed them. Without an
+argument the bundled sample_topics.txt is used.
+"""
+import os
+import sys
+import timeit
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cache.normalize import normalize_topic  # noqa: E402
+
+DEFAULT_LOG = os.path.join(os.path.dirname(__file__), "sample_topics.txt")
+
+
+def main(path):
+    with open(path, encoding="utf-8") as f:
+        topics = [line.rstrip("\n") for line in f if line.strip()]
+
+    rounds = max(1, 200_000 // len(topics))
+    seconds = timeit.timeit(lambda: [normalize_topic(t) for t in topics], number=rounds)
+    per_call_us = seconds / (rounds * len(topics)) * 1e6
+
+    raw = Counter(t.strip() for t in topics)
+    normalized = Counter(normalize_topic(t) for t in topics)
+    reuse_before = 1 - len(raw) / len(topics)
+    reuse_after = 1 - len(normalized) / len(topics)
+
+    print(f"topics in log:            {len(topics)}")
+    print(f"normalize_topic per call: {per_call_us:.2f} µs")
+    print(f"distinct raw keys:        {len(raw)}")
+    print(f"distinct normalized keys: {len(normalized)}  ({1 - len(normalized) / len(raw):.1%} fewer)")
+    print(f"best-case hit rate:       {reuse_before:.1%} raw -> {reuse_after:.1%} normalized")
+    print("\nlargest groups:")
+    for key, count in normalized.most_common(8):
+        print(f"  {count:>4}  {key}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LOG)
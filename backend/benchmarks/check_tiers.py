@@ -0,0 +1,74 @@
+"""Check the memory + Redis cache hierarchy against the in-process fake Redis.
+
+Needs the ``redis`` package but no Redis server:
+
+    python benchmarks/check_tiers.py
+
+Covers batched lookups (one MGET per tier), promotion of L2 hits into L1,
+falling through an expired L1 copy, and negative caching of misses. Exits
+non-zero on the first failed check.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cache import CacheEntry, MemoryCache, RedisCache, TieredCache  # noqa: E402
+from fake_redis import FakeRedisServer  # noqa: E402
+
+
+def entry(topic, **fields):
+    return CacheEntry(topic, "eli5", f"An explanation of {topic}.", 100, "v1", **fields)
+
+
+def check(condition, message):
+    print(f"{'ok  ' if condition else 'FAIL'}  {message}")
+    if not condition:
+        raise SystemExit(1)
+
+
+async def main():
+    server = await FakeRedisServer().start()
+    memory, redis = MemoryCache(), RedisCache(server.url)
+    cache = TieredCache([memory, redis], negative_ttl=0.5)
+    await cache.start()
+    try:
+        keys = [f"k{i}" for i in range(50)]
+        await redis.set_many([(key, entry(key)) for key in keys])
+
+        redis.round_trips = 0
+        found = await cache.get_many(keys + ["missing"])
+        check(len(found) == 50, "get_many finds every key stored in L2")
+        check(redis.round_trips == 1, "get_many costs one MGET round trip")
+        check(len(await memory.get_many(keys)) == 50, "L2 hits are promoted into L1")
+
+        redis.round_trips = 0
+        await cache.get_many(keys)
+        check(redis.round_trips == 0, "promoted keys are served by L1 alone")
+
+        redis.round_trips = 0
+        check(await cache.get("missing") is None, "a key missing everywhere stays a miss")
+        check(redis.round_trips == 0, "a recent miss is not looked up in L2 again")
+        check(cache.negative_hits >= 1, "the negative cache counts the skipped lookup")
+        await cache.set("missing", entry("missing"))
+        check(await cache.get("missing") is not None, "writing a key clears its negative mark")
+
+        await asyncio.sleep(0.6)
+        redis.round_trips = 0
+        await cache.get("never-stored")
+        check(redis.round_trips == 1, "negative marks expire after negative_ttl")
+
+        now = time.time()
+        await memory.set("refreshed", entry("old", expires_at=now - 1, stale_until=now + 60))
+        await redis.set("refreshed", entry("new"))
+        check((await cache.get("refreshed")).topic == "new", "an expired L1 copy falls through to L2")
+        check(not (await memory.get("refreshed")).is_expired(), "the fresh copy replaces it in L1")
+    finally:
+        await cache.close()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
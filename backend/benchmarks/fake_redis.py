@@ -0,0 +1,153 @@
+"""In-process stand-in for a Redis server, for tests and benchmarks.
+
+Speaks enough RESP2 for the redis cache tier (GET/SET/MGET/DEL/SCAN and
+friends, with key expiry) so the two-tier cache can be exercised with a
+real ``redis.asyncio`` client and no Redis installed:
+
+    server = FakeRedisServer()
+    await server.start()
+    cache = RedisCache(url=server.url)
+"""
+import asyncio
+import fnmatch
+import time
+
+
+class FakeRedisServer:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.data = {}
+        self.expiry = {}
+        self.commands = 0
+        self._server = None
+
+    @property
+    def url(self):
+        return f"redis://{self.host}:{self.port}/0"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                self.commands += 1
+                writer.write(self._dispatch(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _alive(self, key):
+        expires_at = self.expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.data
+
+    def _dispatch(self, args):
+        name = args[0].decode().upper()
+        handler = getattr(self, f"_cmd_{name.lower()}", None)
+        if handler is None:
+            return f"-ERR unknown command '{name}'\r\n".encode()
+        return handler(*args[1:])
+
+    @staticmethod
+    def _bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _array(self, values):
+        return b"*%d\r\n" % len(values) + b"".join(self._bulk(v) for v in values)
+
+    def _cmd_ping(self, *args):
+        return self._bulk(args[0]) if args else b"+PONG\r\n"
+
+    def _cmd_client(self, *args):
+        return b"+OK\r\n"
+
+    def _cmd_select(self, *args):
+        return b"+OK\r\n"
+
+    def _cmd_get(self, key):
+        return self._bulk(self.data[key] if self._alive(key) else None)
+
+    def _cmd_mget(self, *keys):
+        return self._array([self.data[k] if self._alive(k) else None for k in keys])
+
+    def _cmd_set(self, key, value, *options):
+        options = [o.upper() if isinstance(o, bytes) else o for o in options]
+        expires_at = None
+        if b"EX" in options:
+            expires_at = time.time() + int(options[options.index(b"EX") + 1])
+        if b"PX" in options:
+            expires_at = time.time() + int(options[options.index(b"PX") + 1]) / 1000
+        if b"NX" in options and self._alive(key):
+            return b"$-1\r\n"
+        self.data[key] = value
+        self.expiry.pop(key, None)
+        if expires_at is not None:
+            self.expiry[key] = expires_at
+        return b"+OK\r\n"
+
+    def _cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                self.expiry.pop(key, None)
+                removed += 1
+        return b":%d\r\n" % removed
+
+    _cmd_unlink = _cmd_del
+
+    def _cmd_exists(self, *keys):
+        return b":%d\r\n" % sum(1 for key in keys if self._alive(key))
+
+    def _cmd_ttl(self, key):
+        if not self._alive(key):
+            return b":-2\r\n"
+        expires_at = self.expiry.get(key)
+        return b":%d\r\n" % (int(expires_at - time.time()) if expires_at else -1)
+
+    def _cmd_dbsize(self):
+        return b":%d\r\n" % sum(1 for key in list(self.data) if self._alive(key))
+
+    def _cmd_flushdb(self, *args):
+        self.data.clear()
+        self.expiry.clear()
+        return b"+OK\r\n"
+
+    _cmd_flushall = _cmd_flushdb
+
+    def _cmd_scan(self, cursor, *options):
+        pattern = "*"
+        if b"MATCH" in [o.upper() for o in options]:
+            upper = [o.upper() for o in options]
+            pattern = options[upper.index(b"MATCH") + 1].decode()
+        keys = [k for k in list(self.data) if self._alive(k) and fnmatch.fnmatchcase(k.decode(), pattern)]
+        return b"*2\r\n" + self._bulk(b"0") + self._array(keys)
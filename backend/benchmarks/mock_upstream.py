@@ -0,0 +1,123 @@
+"""Local stand-in for the OpenAI chat completions API, used by the benchmarks.
+
+Every completion sleeps for ``latency`` seconds before answering, which is
+roughly what a real gpt-4o-mini round trip costs us, plus ``token_latency``
+seconds per completion token if set. Token counts follow the request: about
+four characters of prompt per token, and 80% of ``max_tokens`` generated.
+JSON-mode requests get a JSON object with one value per name on the
+prompt's ``Keys:`` line. Like the real API, a prompt whose first
+``cached_prefix`` characters were seen before reports them as
+``cached_tokens`` (OpenAI only caches prefixes of 1024+ tokens).
+Streaming requests get one chunk per completion token, ``token_latency``
+apart, and a usage chunk when ``stream_options.include_usage`` is set.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+CHARS_PER_TOKEN = 4
+
+
+def create_mock_app(latency=1.0, token_latency=0.0, cached_prefix=1024 * CHARS_PER_TOKEN):
+    mock = FastAPI()
+    mock.state.calls = 0
+    mock.state.tokens = 0
+    mock.state.prefixes = set()
+
+    @mock.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        mock.state.calls += 1
+        prompt = "\n".join(m["content"] for m in body["messages"])
+        prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // CHARS_PER_TOKEN
+        completion_tokens = int(body.get("max_tokens") or 90) * 8 // 10
+        cached_tokens = 0
+        if len(prompt) >= cached_prefix:
+            prefix = prompt[:cached_prefix]
+            if prefix in mock.state.prefixes:
+                cached_tokens = cached_prefix // CHARS_PER_TOKEN
+            mock.state.prefixes.add(prefix)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+        if body.get("stream"):
+            mock.state.tokens += prompt_tokens + completion_tokens
+            include_usage = body.get("stream_options", {}).get("include_usage")
+            return StreamingResponse(
+                stream_chunks(body, mock.state.calls, completion_tokens, usage if include_usage else None),
+                media_type="text/event-stream",
+            )
+        await asyncio.sleep(latency + completion_tokens * token_latency)
+
+        if body.get("response_format", {}).get("type") == "json_object":
+            match = re.search(r"^Keys: (.+)$", prompt, re.MULTILINE)
+            names = [name.strip() for name in match.group(1).split(",")] if match else ["answer"]
+            size = completion_tokens * CHARS_PER_TOKEN // len(names)
+            content = json.dumps({
+                name: f"Mock {name} explanation. ".ljust(size, "x") for name in names
+            })
+        else:
+            content = f"Mock explanation for: {prompt[-60:]}"
+        mock.state.tokens += prompt_tokens + completion_tokens
+        return {
+            "id": f"chatcmpl-mock-{mock.state.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": content,
+                    },
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    async def stream_chunks(body, call, completion_tokens, usage):
+        def chunk(delta, usage=None):
+            data = {
+                "id": f"chatcmpl-mock-{call}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "gpt-4o-mini"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}] if delta else [],
+            }
+            if usage:
+                data["usage"] = usage
+            return f"data: {json.dumps(data)}\n\n"
+
+        await asyncio.sleep(latency)
+        yield chunk({"role": "assistant", "content": ""})
+        for i in range(completion_tokens):
+            yield chunk({"content": "Mock " if i == 0 else f"token{i} "})
+            await asyncio.sleep(token_latency)
+        if usage:
+            yield chunk(None, usage)
+        yield "data: [DONE]\n\n"
+
+    return mock
+
+
+def serve_in_thread(asgi_app, port):
+    """Run ``asgi_app`` with uvicorn on its own thread and event loop."""
+    server = uvicorn.Server(
+        uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
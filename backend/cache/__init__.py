@@ -0,0 +1,136 @@
+from cache.compression import Codec
+from cache.entry import CacheEntry, with_ttl
+from cache.keys import key_namespace, make_key, normalize_topic
+from cache.memory import MemoryCache
+from cache.mmap_store import MmapCache
+from cache.redis_store import RedisCache, redis_available
+from cache.semantic import DEFAULT_THRESHOLDS, SemanticIndex, numpy_available
+from cache.sqlite_store import SQLiteCache
+from cache.sweep import VersionSweeper
+from cache.tiered import TieredCache
+from settings import env_bool, env_float, env_int, env_str
+
+
+# How long past its TTL an entry may still be served: immediately while a
+# background refresh runs (stale-while-revalidate), or when the upstream is
+# failing (stale-if-error). Tiers keep expired entries for the longer of the two.
+STALE_WHILE_REVALIDATE = env_int("CACHE_STALE_WHILE_REVALIDATE_SECONDS", 3_600)
+STALE_IF_ERROR = env_int("CACHE_STALE_IF_ERROR_SECONDS", 86_400)
+
+
+def _create_codec():
+    """CACHE_COMPRESSION: "none" (default), "zlib", or "dict" (trained dictionary)."""
+    mode = env_str("CACHE_COMPRESSION", "none")
+    if mode == "none":
+        return None
+    if mode not in ("zlib", "dict"):
+        raise ValueError(f"Unknown CACHE_COMPRESSION: {mode!r}")
+    dictionary = None
+    path = env_str("CACHE_COMPRESSION_DICT")
+    if mode == "dict" and path:
+        with open(path, "rb") as f:
+            dictionary = f.read()
+    return Codec(mode, dictionary)
+
+
+def _create_tier(name):
+    grace = max(STALE_WHILE_REVALIDATE, STALE_IF_ERROR)
+    if name == "memory":
+        return MemoryCache(
+            max_entries=env_int("CACHE_MAX_ENTRIES", 10_000),
+            max_bytes=env_int("CACHE_MAX_BYTES", 64 * 1024 * 1024),
+            ttl=env_int("CACHE_TTL_SECONDS", 86_400),
+            grace=grace,
+            codec=_create_codec(),
+            train_after=env_int("CACHE_COMPRESSION_TRAIN_AFTER", 1_000),
+            policy=env_str("CACHE_EVICTION_POLICY", "lru"),
+            admission=env_str("CACHE_ADMISSION", "none"),
+        )
+    if name == "sqlite":
+        return SQLiteCache(
+            path=env_str("CACHE_SQLITE_PATH", "eli5_cache.db"),
+            ttl=env_int("CACHE_SQLITE_TTL_SECONDS", 30 * 86_400),
+            grace=grace,
+        )
+    if name == "mmap":
+        return MmapCache(
+            path=env_str("CACHE_MMAP_PATH", "eli5_cache"),
+            ttl=env_int("CACHE_MMAP_TTL_SECONDS", 7 * 86_400),
+            grace=grace,
+        )
+    if name == "redis":
+        if not redis_available():
+            raise RuntimeError("CACHE_TIERS includes redis but the 'redis' package is not installed")
+        return RedisCache(
+            url=env_str("CACHE_REDIS_URL", "redis://localhost:6379/0"),
+            ttl=env_int("CACHE_REDIS_TTL_SECONDS", 7 * 86_400),
+            grace=grace,
+        )
+    raise ValueError(f"Unknown cache tier: {name!r}")
+
+
+def create_cache():
+    """Build the explanation cache from CACHE_TIERS (fastest tier first).
+
+    "memory" (the default) keeps everything in-process, "mmap" shares one
+    memory-mapped store between all workers on a host, "sqlite" persists
+    across restarts, "redis" is shared by every instance, and e.g.
+    "memory,redis" uses Redis as an L2 under memory.
+    """
+    names = [name.strip() for name in env_str("CACHE_TIERS", "memory").split(",") if name.strip()]
+    tiers = [_create_tier(name) for name in names]
+    if len(tiers) == 1:
+        return tiers[0]
+    return TieredCache(tiers, negative_ttl=env_float("CACHE_NEGATIVE_TTL_SECONDS", 2.0))
+
+
+def create_semantic_index():
+    """Semantic tier, or None when disabled or numpy is not installed."""
+    if not env_bool("SEMANTIC_CACHE"):
+        return None
+    if not numpy_available():
+        print("⚠️  Warning: SEMANTIC_CACHE is enabled but numpy is not installed, skipping it")
+        return None
+    # SEMANTIC_THRESHOLD sets every level, SEMANTIC_THRESHOLD_<LEVEL> one level.
+    base = env_float("SEMANTIC_THRESHOLD", 0.0)
+    thresholds = {}
+    for level, default in DEFAULT_THRESHOLDS.items():
+        thresholds[level] = env_float(f"SEMANTIC_THRESHOLD_{level.upper()}", base or default)
+    return SemanticIndex(
+        max_entries=env_int("SEMANTIC_MAX_ENTRIES", 5_000),
+        dim=env_int("SEMANTIC_DIM", 512),
+        thresholds=thresholds,
+    )
+
+
+def create_sweeper(cache):
+    """Background purge of outdated prompt versions, unless CACHE_VERSION_SWEEP=false."""
+    if not env_bool("CACHE_VERSION_SWEEP", True):
+        return None
+    return VersionSweeper(
+        cache,
+        interval=env_float("CACHE_SWEEP_INTERVAL_SECONDS", 3_600),
+        start_delay=env_float("CACHE_SWEEP_START_DELAY_SECONDS", 60.0),
+        batch_size=env_int("CACHE_SWEEP_BATCH_SIZE", 500),
+    )
+
+
+__all__ = [
+    "STALE_IF_ERROR",
+    "STALE_WHILE_REVALIDATE",
+    "CacheEntry",
+    "MemoryCache",
+    "MmapCache",
+    "RedisCache",
+    "SQLiteCache",
+    "SemanticIndex",
+    "TieredCache",
+    "VersionSweeper",
+    "create_cache",
+    "create_semantic_index",
+    "create_sweeper",
+    "key_namespace",
+    "make_key",
+    "normalize_topic",
+    "with_ttl",
+]
@@ -0,0 +1,85 @@
+_MASK64 = (1 << 64) - 1
+# Odd 64-bit multipliers: one independent-enough index per sketch row.
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+# Halves both 4-bit counters packed in a byte in one bytes.translate() pass.
+_HALVE = bytes(((b >> 1) & 0x77) for b in range(256))
+
+
+class FrequencySketch:
+    """Count-min sketch of recent access frequency with 4-bit counters.
+
+    Counters saturate at 15 and every counter is halved after ``sample_size``
+    increments, so old popularity fades and memory never grows with traffic:
+    ``width / 2`` bytes however many requests are seen.
+    """
+
+    def __init__(self, width, sample_size=None):
+        self.width = 1 << max(width - 1, 1).bit_length()
+        self._shift = 64 - (self.width.bit_length() - 1)
+        self.sample_size = sample_size or 10 * self.width
+        self.table = bytearray(self.width // 2)
+        self.additions = 0
+        self.resets = 0
+
+    def _indexes(self, key):
+        h = hash(key) & _MASK64
+        return [((h * seed) & _MASK64) >> self._shift for seed in _SEEDS]
+
+    def frequency(self, key):
+        table = self.table
+        return min((table[i >> 1] >> ((i & 1) << 2)) & 0xF for i in self._indexes(key))
+
+    def increment(self, key):
+        table = self.table
+        added = False
+        for i in self._indexes(key):
+            shift = (i & 1) << 2
+            if (table[i >> 1] >> shift) & 0xF < 15:
+                table[i >> 1] += 1 << shift
+                added = True
+        if added:
+            self.additions += 1
+            if self.additions >= self.sample_size:
+                self.reset()
+
+    def reset(self):
+        self.table = bytearray(self.table.translate(_HALVE))
+        self.additions //= 2
+        self.resets += 1
+
+
+class TinyLFU:
+    """Admit a new entry only if it has been asked for more than the victim.
+
+    Every lookup is recorded in a :class:`FrequencySketch`. When the cache is
+    full, a key seen once (most topics) loses to an entry that keeps being
+    hit, so bursts of one-off topics can no longer flush the hot set.
+    """
+
+    name = "tinylfu"
+
+    def __init__(self, capacity):
+        # Four counters per cached entry (two bytes) keeps collisions rare;
+        # aging every 10 * capacity lookups matches the cache's own turnover.
+        self.sketch = FrequencySketch(4 * capacity, sample_size=10 * capacity)
+        self.admitted = 0
+        self.rejected = 0
+
+    def record(self, key):
+        self.sketch.increment(key)
+
+    def admit(self, candidate, victim):
+        if self.sketch.frequency(candidate) > self.sketch.frequency(victim):
+            self.admitted += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def stats(self):
+        return {
+            "admission": self.name,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "sketch_bytes": len(self.sketch.table),
+            "sketch_resets": self.sketch.resets,
+        }
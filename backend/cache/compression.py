@@ -0,0 +1,122 @@
+"""Per-entry compression of cached explanation text.
+
+Explanations are short, repetitive English paragraphs. Compressed one at a
+time, plain zlib has almost no history to match against. A preset dictionary
+(zlib's ``zdict``) trained on our own answers gives every entry that history
+up front, while each entry still decompresses on its own on a cache hit.
+
+Train a dictionary from a cache snapshot (or a text file, one explanation
+per line) and point CACHE_COMPRESSION_DICT at it:
+
+    python -m cache.compression train cache.snap explanations.dict
+"""
+import argparse
+import zlib
+from collections import Counter
+
+# zlib only looks back 32 KiB, so a larger dictionary would be wasted.
+MAX_DICTIONARY_SIZE = 32 * 1024
+_NGRAM_SIZES = (1, 2, 3, 4, 6, 8)
+
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+_ZDICT = b"\x02"
+
+
+def train_dictionary(samples, size=MAX_DICTIONARY_SIZE):
+    """Build a zlib preset dictionary from sample explanations.
+
+    Picks the word n-grams that would save the most bytes (occurrences times
+    length) and lays them out with the most valuable last, where zlib finds
+    them with the shortest distances.
+    """
+    counts = Counter()
+    for text in samples:
+        words = text.split(" ")
+        for n in _NGRAM_SIZES:
+            for i in range(len(words) - n + 1):
+                counts[" ".join(words[i:i + n])] += 1
+
+    candidates = sorted(
+        ((count - 1) * len(gram), gram) for gram, count in counts.items() if count > 1 and len(gram) > 3
+    )
+    chosen, total = [], 0
+    for _, gram in reversed(candidates):
+        if total + len(gram) + 1 > size:
+            continue
+        if any(gram in picked for picked in chosen[-200:]):
+            continue
+        chosen.append(gram)
+        total += len(gram) + 1
+        if size - total < 8:
+            break
+    return " ".join(reversed(chosen)).encode()[:size]
+
+
+class Codec:
+    """Compresses explanation text to tagged blobs and back.
+
+    ``mode`` is "zlib" or "dict". In "dict" mode without a dictionary yet,
+    text is stored with plain zlib until :meth:`set_dictionary` is called;
+    the leading tag byte says how each blob was written.
+    """
+
+    def __init__(self, mode="dict", dictionary=None, level=6):
+        self.mode = mode
+        self.level = level
+        self.dictionary = dictionary
+
+    def set_dictionary(self, dictionary):
+        self.dictionary = dictionary
+
+    def compress(self, text):
+        data = text.encode()
+        if self.mode == "dict" and self.dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+            blob = _ZDICT + compressor.compress(data) + compressor.flush()
+        else:
+            blob = _ZLIB + zlib.compress(data, self.level)
+        # Tiny answers can grow under compression; keep whichever is smaller.
+        return blob if len(blob) < len(data) + 1 else _RAW + data
+
+    def decompress(self, blob):
+        tag, payload = blob[:1], blob[1:]
+        if tag == _ZDICT:
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+            return (decompressor.decompress(payload) + decompressor.flush()).decode()
+        if tag == _ZLIB:
+            return zlib.decompress(payload).decode()
+        return payload.decode()
+
+
+def load_samples(path, limit=5_000):
+    """Explanations from a cache snapshot, or one per line from a text file."""
+    from cache.snapshot import MAGIC, iter_records, read_header
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            f.seek(0)
+            read_header(f)
+            samples = []
+            for _, entry in iter_records(f):
+                samples.append(entry.explanation)
+                if len(samples) >= limit:
+                    break
+            return samples
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line, _ in zip(f, range(limit)) if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a compression dictionary for cached explanations.")
+    parser.add_argument("command", choices=["train"])
+    parser.add_argument("source", help="cache snapshot, or a text file with one explanation per line")
+    parser.add_argument("output")
+    parser.add_argument("--size", type=int, default=MAX_DICTIONARY_SIZE)
+    args = parser.parse_args()
+
+    samples = load_samples(args.source)
+    dictionary = train_dictionary(samples, args.size)
+    with open(args.output, "wb") as f:
+        f.write(dictionary)
+    print(f"Trained a {len(dictionary)} byte dictionary from {len(samples)} explanations")
@@ -0,0 +1,50 @@
+import time
+from dataclasses import dataclass, field, replace
+
+# Rough per-entry bookkeeping cost on top of the text itself (dict slot,
+# dataclass, key string headers). Only used for the byte budget.
+ENTRY_OVERHEAD_BYTES = 200
+
+
+@dataclass
+class CacheEntry:
+    topic: str
+    level: str
+    explanation: str
+    tokens_used: int
+    prompt_version: str
+    created_at: float = field(default_factory=time.time)
+    expires_at: float = 0.0
+    stale_until: float = 0.0
+    hits: int = 0
+
+    def is_expired(self, now=None):
+        """True once the entry is past its TTL (it may still be served stale)."""
+        return bool(self.expires_at) and (now or time.time()) >= self.expires_at
+
+    def is_dead(self, now=None):
+        """True once the entry is past its stale grace too and must be dropped."""
+        limit = self.stale_until or self.expires_at
+        return bool(limit) and (now or time.time()) >= limit
+
+    def size(self):
+        return len(self.explanation.encode()) + len(self.topic.encode()) + ENTRY_OVERHEAD_BYTES
+
+
+def with_ttl(entry, ttl, grace=0):
+    """Copy of ``entry`` expiring at most ``ttl`` seconds from now.
+
+    Each tier applies its own TTL, counted from when it stores the entry, on
+    top of whatever expiry the entry already carries: an entry promoted from a
+    longer-lived tier gets a full upper-tier TTL but never outlives its source.
+    ``grace`` keeps the expired entry around that much longer so it can be
+    served stale while it is refreshed, or while the upstream is failing.
+    """
+    expires_at = entry.expires_at
+    if ttl:
+        limit = time.time() + ttl
+        expires_at = min(expires_at, limit) if expires_at else limit
+    stale_until = expires_at + grace if expires_at else 0.0
+    if entry.stale_until:
+        stale_until = min(stale_until, entry.stale_until) if stale_until else entry.stale_until
+    return replace(entry, expires_at=expires_at, stale_until=stale_until)
@@ -0,0 +1,16 @@
+import prompts
+from cache.normalize import NORMALIZATION_VERSION, normalize_topic
+
+
+def key_namespace(level):
+    return f"{level}:{prompts.prompt_version(level)}:n{NORMALIZATION_VERSION}"
+
+
+def make_key(topic, level):
+    """Cache key for an explanation of ``topic`` at ``level``.
+
+    The prompt and normalization versions are part of the key, so answers
+    produced under an older prompt, parameters or topic normalization are
+    never returned for the current one.
+    """
+    return f"{key_namespace(level)}:{normalize_topic(topic)}"
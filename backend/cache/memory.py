@@ -0,0 +1,228 @@
+import asyncio
+import time
+from dataclasses import replace
+
+from cache.admission import TinyLFU
+from cache.compression import train_dictionary
+from cache.entry import ENTRY_OVERHEAD_BYTES, with_ttl
+from cache.policy import create_policy
+
+
+class _Slot:
+    """A stored entry. With a codec the text lives compressed in ``blob``."""
+
+    __slots__ = ("entry", "blob", "size", "text_size")
+
+    def __init__(self, entry, blob, size, text_size):
+        self.entry = entry
+        self.blob = blob
+        self.size = size
+        self.text_size = text_size
+
+
+class MemoryCache:
+    """Bounded in-process cache with a per-entry TTL.
+
+    ``policy`` picks what is evicted when a limit is hit: "lru" (default) or
+    "gdsf", which weighs each entry's token cost, size and hit count. With
+    ``admission="tinylfu"`` a new key only displaces the eviction victim if it
+    has been looked up more often recently.
+
+    With a ``codec`` the explanation text is kept compressed and only
+    decompressed on a hit. A "dict" codec without a dictionary trains one on
+    the first ``train_after`` answers stored, then recompresses what it holds.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries=10_000, max_bytes=64 * 1024 * 1024, ttl=86_400, grace=0,
+                 codec=None, train_after=1_000, policy="lru", admission=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.grace = grace
+        self.codec = codec
+        self.train_after = train_after
+        self._entries = {}
+        self.policy = create_policy(policy)
+        if admission not in (None, "none", "tinylfu"):
+            raise ValueError(f"Unknown admission filter: {admission!r}")
+        self.admission = TinyLFU(max_entries) if admission == "tinylfu" else None
+        self._training = None
+        self.bytes = 0
+        self.text_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._levels = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _pack(self, entry):
+        text_size = len(entry.explanation.encode())
+        if self.codec is None:
+            return _Slot(entry, None, entry.size(), text_size)
+        blob = self.codec.compress(entry.explanation)
+        size = len(blob) + len(entry.topic.encode()) + ENTRY_OVERHEAD_BYTES
+        return _Slot(replace(entry, explanation=""), blob, size, text_size)
+
+    def _unpack(self, slot):
+        if slot.blob is None:
+            return slot.entry
+        return replace(slot.entry, explanation=self.codec.decompress(slot.blob))
+
+    async def get(self, key):
+        if self.admission:
+            self.admission.record(key)
+        slot = self._entries.get(key)
+        if slot is None:
+            self.misses += 1
+            return None
+        if slot.entry.is_dead():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.policy.touch(key, slot)
+        slot.entry.hits += 1
+        self.hits += 1
+        return self._unpack(slot)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        if self._training:
+            self._training.cancel()
+
+    async def get_many(self, keys):
+        found = {}
+        for key in keys:
+            entry = await self.get(key)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    async def set(self, key, entry):
+        entry = with_ttl(entry, self.ttl, self.grace)
+        slot = self._pack(entry)
+        if slot.size > self.max_bytes:
+            return False
+        if key in self._entries:
+            self._remove(key)
+        elif not self._admit(key, slot):
+            return False
+        self._entries[key] = slot
+        self.policy.insert(key, slot)
+        self._count(slot, 1)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._evict()
+        self._maybe_train()
+        return True
+
+    def _admit(self, key, slot):
+        if not self.admission:
+            return True
+        full = (len(self._entries) >= self.max_entries
+                or self.bytes + slot.size > self.max_bytes)
+        victim = self.policy.victim() if full else None
+        return victim is None or self.admission.admit(key, victim)
+
+    def _evict(self):
+        victim = self.policy.victim()
+        self.policy.evicted(victim)
+        self._levels[self._remove(victim).level]["evictions"] += 1
+        self.evictions += 1
+
+    def _count(self, slot, sign):
+        """Keep the totals and per-level counts in step as slots come and go."""
+        self.bytes += sign * slot.size
+        self.text_bytes += sign * slot.text_size
+        level = self._levels.get(slot.entry.level)
+        if level is None:
+            level = self._levels[slot.entry.level] = {"entries": 0, "bytes": 0, "evictions": 0}
+        level["entries"] += sign
+        level["bytes"] += sign * slot.size
+
+    def _maybe_train(self):
+        codec = self.codec
+        if (codec is None or codec.mode != "dict" or codec.dictionary
+                or self._training or len(self._entries) < self.train_after):
+            return
+        samples = [self._unpack(slot).explanation for slot in list(self._entries.values())[:5_000]]
+        self._training = asyncio.ensure_future(self._train(samples))
+
+    async def _train(self, samples):
+        dictionary = await asyncio.to_thread(train_dictionary, samples)
+        self.codec.set_dictionary(dictionary)
+        # Recompress what is already held so it benefits too.
+        for key, slot in list(self._entries.items()):
+            if self._entries.get(key) is slot:
+                packed = self._pack(self._unpack(slot))
+                self._entries[key] = packed
+                self._count(slot, -1)
+                self._count(packed, 1)
+
+    async def set_many(self, items):
+        for key, entry in items:
+            await self.set(key, entry)
+        return True
+
+    async def items(self):
+        """Yield every live ``(key, entry)``, stale ones included."""
+        now = time.time()
+        for key, slot in list(self._entries.items()):
+            if not slot.entry.is_dead(now):
+                yield key, self._unpack(slot)
+
+    async def delete(self, key):
+        return self._remove(key) is not None
+
+    async def clear(self):
+        self._entries.clear()
+        self.policy = create_policy(self.policy.name)
+        self.bytes = 0
+        self.text_bytes = 0
+        for level in self._levels.values():
+            level["entries"] = level["bytes"] = 0
+
+    def _remove(self, key):
+        slot = self._entries.pop(key, None)
+        if slot is None:
+            return None
+        self.policy.remove(key)
+        self._count(slot, -1)
+        return slot.entry
+
+    def purge_expired(self, now=None):
+        now = now or time.time()
+        expired = [key for key, slot in self._entries.items() if slot.entry.is_dead(now)]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "eviction_policy": self.policy.name,
+            "compression": self.codec.mode if self.codec else None,
+            "text_bytes": self.text_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "levels": {level: dict(counts) for level, counts in self._levels.items()},
+            **(self.admission.stats() if self.admission else {}),
+        }
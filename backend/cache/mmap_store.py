@@ -0,0 +1,424 @@
+import asyncio
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from cache.entry import CacheEntry, with_ttl
+
+# On-disk layout, shared by every worker process on the host:
+#
+#   <path>.ctl          magic + current generation number
+#   <path>.<gen>.idx    open-addressing hash table of (key hash, record offset)
+#   <path>.<gen>.dat    append-only records: length, crc32, body
+#
+# Readers only touch the memory maps and never take a lock; a reader that
+# sees a torn or half-written record fails the CRC check and treats it as a
+# miss. Writers (and compaction) hold an exclusive flock on the .ctl file,
+# append the record first and publish it by storing its offset in the index
+# afterwards. Compaction writes a new generation and bumps the number in
+# .ctl; readers notice on their next lookup and remap.
+_CTL = struct.Struct("<8sQ")
+_CTL_MAGIC = b"ELI5CTL2"
+_IDX_HEADER = struct.Struct("<8sQQQQ")  # magic, capacity, used slots, live entries, dead bytes
+_IDX_MAGIC = b"ELI5IDX2"
+_SLOT = struct.Struct("<QQ")  # key hash (0 = empty), record offset (1 = deleted)
+_DAT_MAGIC = b"ELI5DAT2"
+_RECORD_HEADER = struct.Struct("<II")  # body length, crc32(body)
+# key, topic, level, version lengths, tokens, created, expires, stale until, text length
+_BODY = struct.Struct("<HHBBIdddI")
+_DELETED = 1
+_MAX_LOAD = 0.7
+
+
+def _key_hash(key):
+    value = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+    return value or 1
+
+
+def _capacity_for(entries, minimum):
+    capacity = minimum
+    while entries > capacity * _MAX_LOAD / 2:
+        capacity *= 2
+    return capacity
+
+
+def _encode(key, entry):
+    fields = [
+        key.encode(), entry.topic.encode(), entry.level.encode(), entry.prompt_version.encode(),
+    ]
+    text = entry.explanation.encode()
+    body = _BODY.pack(
+        *(len(field) for field in fields),
+        entry.tokens_used, entry.created_at, entry.expires_at, entry.stale_until, len(text),
+    ) + b"".join(fields) + text
+    return _RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def _decode(body):
+    key_len, topic_len, level_len, version_len, tokens, created, expires, stale, text_len = _BODY.unpack_from(body)
+    pos = _BODY.size
+    values = []
+    for length in (key_len, topic_len, level_len, version_len, text_len):
+        values.append(bytes(body[pos:pos + length]).decode())
+        pos += length
+    key, topic, level, version, text = values
+    return key, CacheEntry(
+        topic=topic, level=level, explanation=text, tokens_used=tokens,
+        prompt_version=version, created_at=created, expires_at=expires, stale_until=stale,
+    )
+
+
+class _Mapping:
+    """One process-local view (index + data maps) of a generation."""
+
+    def __init__(self, path, generation):
+        self.generation = generation
+        with open(f"{path}.{generation}.idx", "r+b") as f:
+            self.idx = mmap.mmap(f.fileno(), 0)
+        self.dat_file = open(f"{path}.{generation}.dat", "r+b")
+        self.dat = mmap.mmap(self.dat_file.fileno(), 0)
+
+    def close(self):
+        self.idx.close()
+        self.dat.close()
+        self.dat_file.close()
+
+    def header(self):
+        return _IDX_HEADER.unpack_from(self.idx)
+
+    def write_header(self, used, live, dead):
+        capacity = self.header()[1]
+        _IDX_HEADER.pack_into(self.idx, 0, _IDX_MAGIC, capacity, used, live, dead)
+
+    def probe(self, key_hash):
+        """Yield ``(slot_position, slot_hash, offset)`` along the probe chain."""
+        capacity = self.header()[1]
+        mask = capacity - 1
+        slot = key_hash & mask
+        for _ in range(capacity):
+            position = _IDX_HEADER.size + slot * _SLOT.size
+            slot_hash, offset = _SLOT.unpack_from(self.idx, position)
+            yield position, slot_hash, offset
+            if slot_hash == 0:
+                return
+            slot = (slot + 1) & mask
+
+    def slots(self):
+        capacity = self.header()[1]
+        for slot in range(capacity):
+            yield _SLOT.unpack_from(self.idx, _IDX_HEADER.size + slot * _SLOT.size)
+
+    def read_record(self, offset):
+        """Return ``((key, entry), size)``, or ``(None, 0)`` for a bad record."""
+        end = offset + _RECORD_HEADER.size
+        if end > len(self.dat):
+            # Another writer appended since we mapped the file.
+            self.dat = mmap.mmap(self.dat_file.fileno(), 0)
+            if end > len(self.dat):
+                return None, 0
+        length, crc = _RECORD_HEADER.unpack_from(self.dat, offset)
+        end += length
+        if end > len(self.dat):
+            self.dat = mmap.mmap(self.dat_file.fileno(), 0)
+            if end > len(self.dat):
+                return None, 0
+        body = self.dat[offset + _RECORD_HEADER.size:end]
+        if zlib.crc32(body) != crc:
+            return None, 0
+        return _decode(body), _RECORD_HEADER.size + length
+
+    def find(self, key):
+        key_hash = _key_hash(key)
+        for _, slot_hash, offset in self.probe(key_hash):
+            if slot_hash == key_hash:
+                if offset <= _DELETED:
+                    return None
+                record, _ = self.read_record(offset)
+                if record and record[0] == key:
+                    return record[1]
+                return None
+        return None
+
+
+class MmapCache:
+    """Append-only, memory-mapped explanation store shared across processes.
+
+    Every uvicorn worker on a host opens the same files and reads the same
+    page-cache pages, so an answer cached by one worker is a hit for all of
+    them. Superseded and expired records are dropped by a background
+    compaction once they make up ``compact_ratio`` of the data file.
+
+    Lookups run on the event loop against the reader mapping; writes and
+    compaction run on a single writer thread with their own mapping, so the
+    two never swap files out from under each other.
+    """
+
+    name = "mmap"
+
+    def __init__(self, path="eli5_cache", ttl=7 * 86_400, grace=0, initial_capacity=1 << 16,
+                 compact_ratio=0.5, compact_interval=60.0):
+        self.path = path
+        self.ttl = ttl
+        self.grace = grace
+        self.initial_capacity = initial_capacity
+        self.compact_ratio = compact_ratio
+        self.compact_interval = compact_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mmap-cache")
+        self._ctl_fd = None
+        self._ctl = None
+        self._reader = None
+        self._writer = None
+        self._compactor = None
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.writes = 0
+        self.compactions = 0
+
+    # -- files -------------------------------------------------------------
+
+    def _file(self, generation, suffix):
+        return f"{self.path}.{generation}.{suffix}"
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._ctl_fd = os.open(f"{self.path}.ctl", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._ctl_fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._ctl_fd).st_size < _CTL.size:
+                os.pwrite(self._ctl_fd, _CTL.pack(b"", 0), 0)
+            magic, generation = _CTL.unpack(os.pread(self._ctl_fd, _CTL.size, 0))
+            if magic != _CTL_MAGIC:
+                # New file, or one written by an older layout: start over in
+                # a fresh generation rather than misreading it.
+                generation += 1
+                self._create_generation(generation, self.initial_capacity)
+                os.pwrite(self._ctl_fd, _CTL.pack(_CTL_MAGIC, generation), 0)
+            self._ctl = mmap.mmap(self._ctl_fd, _CTL.size)
+            generation = self._current_generation()
+            self._reader = _Mapping(self.path, generation)
+            self._writer = _Mapping(self.path, generation)
+        finally:
+            fcntl.flock(self._ctl_fd, fcntl.LOCK_UN)
+
+    def _create_generation(self, generation, capacity):
+        with open(self._file(generation, "idx"), "wb") as f:
+            f.write(_IDX_HEADER.pack(_IDX_MAGIC, capacity, 0, 0, 0))
+            f.truncate(_IDX_HEADER.size + capacity * _SLOT.size)
+        with open(self._file(generation, "dat"), "wb") as f:
+            f.write(_DAT_MAGIC)
+
+    def _current_generation(self):
+        return _CTL.unpack_from(self._ctl)[1]
+
+    def _current_reader(self):
+        generation = self._current_generation()
+        if generation != self._reader.generation:
+            # The old maps stay valid after compaction unlinks their files;
+            # dropping the reference is enough.
+            self._reader = _Mapping(self.path, generation)
+        return self._reader
+
+    # -- writes (writer thread, under the cross-process lock) ---------------
+
+    def _locked(self, fn, *args):
+        fcntl.flock(self._ctl_fd, fcntl.LOCK_EX)
+        try:
+            generation = self._current_generation()
+            if generation != self._writer.generation:
+                self._writer.close()
+                self._writer = _Mapping(self.path, generation)
+            return fn(*args)
+        finally:
+            fcntl.flock(self._ctl_fd, fcntl.LOCK_UN)
+
+    def _put(self, key, entry):
+        record = None
+        if entry is not None:
+            try:
+                record = _encode(key, entry)
+            except struct.error:
+                # Key or topic too long for the 16-bit length fields.
+                return False
+        writer = self._writer
+        _, capacity, used, live, dead = writer.header()
+        if used + 1 > capacity * _MAX_LOAD:
+            self._compact_locked()
+            writer = self._writer
+            _, capacity, used, live, dead = writer.header()
+
+        key_hash = _key_hash(key)
+        position, offset = None, 0
+        for position, slot_hash, offset in writer.probe(key_hash):
+            if slot_hash in (0, key_hash):
+                break
+
+        if entry is None and offset <= _DELETED:
+            return
+        if offset > _DELETED:
+            _, old_size = writer.read_record(offset)
+            dead += old_size
+            live -= 1
+        if entry is not None:
+            writer.dat_file.seek(0, os.SEEK_END)
+            new_offset = writer.dat_file.tell()
+            writer.dat_file.write(record)
+            writer.dat_file.flush()
+            live += 1
+        else:
+            new_offset = _DELETED
+
+        # Publish: offset first, then the hash that makes a new slot visible.
+        struct.pack_into("<Q", writer.idx, position + 8, new_offset)
+        if offset == 0:
+            struct.pack_into("<Q", writer.idx, position, key_hash)
+            used += 1
+        writer.write_header(used, live, dead)
+        self.writes += 1
+        return True
+
+    def _compact_locked(self, drop_all=False):
+        """Copy live, unexpired records into a fresh generation."""
+        now = time.time()
+        old = self._writer
+        live_records = []
+        if not drop_all:
+            for slot_hash, offset in old.slots():
+                if slot_hash and offset > _DELETED:
+                    record, _ = old.read_record(offset)
+                    if record and not record[1].is_dead(now):
+                        live_records.append(record)
+
+        generation = old.generation + 1
+        self._create_generation(generation, _capacity_for(len(live_records), self.initial_capacity))
+        self._writer = _Mapping(self.path, generation)
+        writes = self.writes
+        for key, entry in live_records:
+            self._put(key, entry)
+        self.writes = writes
+
+        os.pwrite(self._ctl_fd, _CTL.pack(_CTL_MAGIC, generation), 0)
+        old.close()
+        for suffix in ("idx", "dat"):
+            try:
+                os.unlink(self._file(old.generation, suffix))
+            except FileNotFoundError:
+                pass
+        self.compactions += 1
+
+    def _needs_compaction(self):
+        dead = self._writer.header()[4]
+        size = os.fstat(self._writer.dat_file.fileno()).st_size
+        return dead > 0 and dead >= self.compact_ratio * size
+
+    # -- cache interface ---------------------------------------------------
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def start(self):
+        if self._ctl is None:
+            await self._run(self._open)
+        self._compactor = asyncio.create_task(self._compact_loop())
+
+    async def close(self):
+        if self._compactor:
+            self._compactor.cancel()
+            try:
+                await self._compactor
+            except asyncio.CancelledError:
+                pass
+            self._compactor = None
+        if self._ctl is not None:
+            await self._run(self._writer.close)
+            self._reader.close()
+            self._ctl.close()
+            os.close(self._ctl_fd)
+            self._ctl = None
+        self._executor.shutdown(wait=True)
+
+    async def _compact_loop(self):
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            await self.compact(only_if_needed=True)
+
+    async def compact(self, only_if_needed=False):
+        def run():
+            if not only_if_needed or self._needs_compaction():
+                self._compact_locked()
+
+        await self._run(self._locked, run)
+
+    async def get(self, key):
+        entry = self._current_reader().find(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.is_dead():
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    async def get_many(self, keys):
+        found = {}
+        for key in keys:
+            entry = await self.get(key)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    async def set(self, key, entry):
+        return await self._run(self._locked, self._put, key, with_ttl(entry, self.ttl, self.grace))
+
+    async def set_many(self, items):
+        def put_all():
+            for key, entry in items:
+                self._put(key, with_ttl(entry, self.ttl, self.grace))
+
+        items = list(items)
+        await self._run(self._locked, put_all)
+        return True
+
+    async def items(self):
+        reader = self._current_reader()
+        now = time.time()
+        for slot_hash, offset in reader.slots():
+            if slot_hash and offset > _DELETED:
+                record, _ = reader.read_record(offset)
+                if record and not record[1].is_dead(now):
+                    yield record
+
+    async def delete(self, key):
+        await self._run(self._locked, self._put, key, None)
+        return True
+
+    async def clear(self):
+        await self._run(self._locked, self._compact_locked, True)
+
+    def stats(self):
+        reader = self._current_reader()
+        _, capacity, used, live, dead = reader.header()
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "generation": reader.generation,
+            "entries": live,
+            "bytes": os.fstat(reader.dat_file.fileno()).st_size,
+            "dead_bytes": dead,
+            "index_capacity": capacity,
+            "index_load": round(used / capacity, 4),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expirations": self.expirations,
+            "writes": self.writes,
+            "compactions": self.compactions,
+        }
@@ -0,0 +1,53 @@
+import re
+import unicodedata
+
+# Bump when a change here maps a topic to a different key, so answers cached
+# under the old rules are never served for the new ones.
+NORMALIZATION_VERSION = 3
+
+_APOSTROPHES = str.maketrans("", "", "'’‘`")
+# Keep "+", "#" and "/" so "C++", "C#" and "A/B" don't collapse to one letter.
+_PUNCTUATION = re.compile(r"[^\w\s+#/]+")
+_WHITESPACE = re.compile(r"\s+")
+# Question words that carry meaning ("why is", "who was", "how are") are
+# kept, and an article is only dropped right after a filler phrase: "The Who"
+# stays distinct from "who".
+_FILLER_PREFIX = re.compile(
+    r"^(?:(?:please|pls|can you|could you|would you|eli5|explain|describe|define|"
+    r"tell me about|teach me|what is|what are|whats|what does|meaning of|to me)"
+    r"(?:\s+(?:the|a|an))?\s+)+"
+)
+_HOW_DOES = re.compile(r"^(?:please\s+)?how (?:does|do|did)(?:\s+(?:the|a|an))?\s+")
+_FILLER_SUFFIX = re.compile(r"(?:\s+(?:please|in simple terms|simply|for me|to me|like im 5|like i am 5))+$")
+_WORKS_SUFFIX = re.compile(r"\s+(?:work|works|happen|happens)$")
+# What is left of a topic that had no subject of its own ("what is it",
+# "explain please"): too vague to share a key with other such requests.
+_VAGUE = frozenset({
+    "it", "this", "that", "these", "those", "they", "them", "he", "she", "him", "her",
+    "please", "pls", "simply", "me", "to me", "for me",
+})
+
+
+def normalize_topic(topic):
+    """Canonical form of a topic, used for cache and coalescing keys.
+
+    "What is Blockchain?", "blockchain" and "  explain  blockchain " all
+    normalize to "blockchain". Deterministic and dependency-free; a few
+    microseconds per call.
+    """
+    text = unicodedata.normalize("NFKC", topic).casefold().translate(_APOSTROPHES)
+    text = _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+    collapsed = text
+
+    how = _HOW_DOES.match(text)
+    if how:
+        text = _WORKS_SUFFIX.sub("", text[how.end():])
+    text = _FILLER_PREFIX.sub("", text)
+    text = _FILLER_SUFFIX.sub("", text)
+
+    # A topic made only of filler words and pronouns ("what is it", "explain
+    # please") keeps its plain form rather than collapsing to a key like "it"
+    # shared by every such request.
+    if not text or text in _VAGUE:
+        return collapsed or topic.strip()
+    return text
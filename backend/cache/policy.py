@@ -0,0 +1,99 @@
+import heapq
+from collections import OrderedDict
+
+
+class LRUPolicy:
+    """Evict the least recently used entry."""
+
+    name = "lru"
+
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def insert(self, key, slot):
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def touch(self, key, slot):
+        self._order.move_to_end(key)
+
+    def remove(self, key):
+        self._order.pop(key, None)
+
+    def victim(self):
+        return next(iter(self._order), None)
+
+    def evicted(self, key):
+        self.remove(key)
+
+
+class GDSFPolicy:
+    """GreedyDual-Size-Frequency: keep what is expensive to regenerate per byte.
+
+    An entry's priority is ``clock + frequency * cost / size``, where cost is
+    the ``tokens_used`` it took to generate and size its resident bytes. The
+    lowest priority is evicted and the clock rises to it, so entries that
+    stop being hit age out even if they were once costly.
+
+    Tokens grow with the answer's length, so cost per byte is about the same
+    for every entry and the hit count decides. The fixed prompt tokens tip
+    ties toward short answers: an eli5 answer outlives an equally popular
+    expert one.
+    """
+
+    name = "gdsf"
+
+    def __init__(self):
+        self.clock = 0.0
+        self._heap = []
+        self._priority = {}
+        self._frequency = {}
+        self._counter = 0
+
+    def _push(self, key, slot):
+        cost = max(slot.entry.tokens_used, 1)
+        priority = self.clock + self._frequency[key] * cost / max(slot.size, 1)
+        self._priority[key] = priority
+        self._counter += 1
+        heapq.heappush(self._heap, (priority, self._counter, key))
+        if len(self._heap) > 4 * len(self._priority) + 64:
+            self._rebuild()
+
+    def _rebuild(self):
+        # Drop superseded heap items left behind by touch() and remove().
+        self._heap = [item for item in self._heap if self._priority.get(item[2]) == item[0]]
+        heapq.heapify(self._heap)
+
+    def insert(self, key, slot):
+        self._frequency[key] = 1
+        self._push(key, slot)
+
+    def touch(self, key, slot):
+        self._frequency[key] = self._frequency.get(key, 0) + 1
+        self._push(key, slot)
+
+    def remove(self, key):
+        self._priority.pop(key, None)
+        self._frequency.pop(key, None)
+
+    def victim(self):
+        while self._heap:
+            priority, _, key = self._heap[0]
+            if self._priority.get(key) == priority:
+                return key
+            heapq.heappop(self._heap)
+        return None
+
+    def evicted(self, key):
+        self.clock = self._priority.get(key, self.clock)
+        self.remove(key)
+
+
+POLICIES = {policy.name: policy for policy in (LRUPolicy, GDSFPolicy)}
+
+
+def create_policy(name):
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown eviction policy: {name!r}") from None
@@ -0,0 +1,176 @@
+import json
+import time
+from dataclasses import asdict
+
+from cache.entry import CacheEntry, with_ttl
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # optional dependency, only needed for the "redis" tier
+    aioredis = None
+
+
+def redis_available():
+    return aioredis is not None
+
+
+def _redact(url):
+    scheme, sep, rest = url.partition("://")
+    if "@" in rest:
+        rest = "***@" + rest.rsplit("@", 1)[1]
+    return scheme + sep + rest
+
+
+def _dumps(entry):
+    data = asdict(entry)
+    data.pop("hits", None)
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _loads(raw):
+    return CacheEntry(**json.loads(raw))
+
+
+class RedisCache:
+    """Explanation cache on any server speaking the Redis protocol.
+
+    Entries are JSON values under ``prefix + key`` with a server-side TTL,
+    so every app instance sees the same cache. ``get_many`` fetches a batch
+    of keys in a single MGET round trip.
+    """
+
+    name = "redis"
+
+    def __init__(self, url="redis://localhost:6379/0", ttl=7 * 86_400, grace=0, prefix="eli5:explain:",
+                 client=None):
+        if client is None and aioredis is None:
+            raise RuntimeError("The redis cache tier needs the 'redis' package")
+        self.url = url
+        self.ttl = ttl
+        self.grace = grace
+        self.prefix = prefix
+        self._client = client
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.writes = 0
+        self.round_trips = 0
+
+    async def start(self):
+        if self._client is None:
+            self._client = aioredis.from_url(self.url)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _entry(self, raw):
+        if raw is None:
+            self.misses += 1
+            return None
+        entry = _loads(raw)
+        if entry.is_dead():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    async def get(self, key):
+        try:
+            self.round_trips += 1
+            raw = await self._client.get(self.prefix + key)
+        except Exception:
+            # An unreachable L2 degrades to a miss instead of failing /explain.
+            self.errors += 1
+            self.misses += 1
+            return None
+        return self._entry(raw)
+
+    async def get_many(self, keys):
+        if not keys:
+            return {}
+        try:
+            self.round_trips += 1
+            values = await self._client.mget([self.prefix + key for key in keys])
+        except Exception:
+            self.errors += 1
+            self.misses += len(keys)
+            return {}
+        found = {}
+        for key, raw in zip(keys, values):
+            entry = self._entry(raw)
+            if entry is not None:
+                found[key] = entry
+        return found
+
+    def _prepare(self, entry):
+        entry = with_ttl(entry, self.ttl, self.grace)
+        limit = entry.stale_until or entry.expires_at
+        return entry, max(1, int(limit - time.time())) if limit else None
+
+    async def set(self, key, entry):
+        entry, ttl = self._prepare(entry)
+        try:
+            self.round_trips += 1
+            await self._client.set(self.prefix + key, _dumps(entry), ex=ttl)
+        except Exception:
+            self.errors += 1
+            return False
+        self.writes += 1
+        return True
+
+    async def set_many(self, items):
+        """Store ``(key, entry)`` pairs in one pipelined round trip."""
+        if not items:
+            return True
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, entry in items:
+                entry, ttl = self._prepare(entry)
+                pipe.set(self.prefix + key, _dumps(entry), ex=ttl)
+            try:
+                self.round_trips += 1
+                await pipe.execute()
+            except Exception:
+                self.errors += 1
+                return False
+        self.writes += len(items)
+        return True
+
+    async def items(self, chunk_size=500):
+        keys = []
+        async for raw_key in self._client.scan_iter(match=self.prefix + "*", count=chunk_size):
+            keys.append(raw_key)
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            for raw_key, raw in zip(chunk, await self._client.mget(chunk)):
+                if raw is not None:
+                    entry = _loads(raw)
+                    if not entry.is_dead():
+                        yield raw_key.decode()[len(self.prefix):], entry
+
+    async def delete(self, key):
+        try:
+            self.round_trips += 1
+            return bool(await self._client.delete(self.prefix + key))
+        except Exception:
+            self.errors += 1
+            return False
+
+    async def clear(self):
+        keys = [key async for key in self._client.scan_iter(match=self.prefix + "*", count=500)]
+        if keys:
+            await self._client.delete(*keys)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "url": _redact(self.url),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "round_trips": self.round_trips,
+            "errors": self.errors,
+        }
@@ -0,0 +1,159 @@
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, the semantic tier is disabled without it
+    np = None
+
+from cache.keys import key_namespace
+from cache.normalize import normalize_topic
+
+# Default cosine similarity a cached topic needs before its answer is reused.
+# Higher levels are stricter: a near miss is more noticeable in an expert
+# answer than in an ELI5 analogy.
+DEFAULT_THRESHOLDS = {
+    "eli5": 0.85,
+    "eli10": 0.85,
+    "teen": 0.88,
+    "college": 0.9,
+    "expert": 0.92,
+}
+
+
+def numpy_available():
+    return np is not None
+
+
+class HashingVectorizer:
+    """Network-free topic embedding: hashed word and character n-grams.
+
+    Words carry the meaning, character trigrams absorb plurals and small
+    spelling differences ("vaccine" / "vaccines"). Vectors are L2-normalized
+    so a dot product is the cosine similarity.
+    """
+
+    def __init__(self, dim=512, char_ngram=3, char_weight=0.5):
+        self.dim = dim
+        self.char_ngram = char_ngram
+        self.char_weight = char_weight
+
+    def _features(self, text):
+        for word in text.split():
+            # Cheap plural folding so "black holes" and "black hole" share words.
+            if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+            yield "w:" + word, 1.0
+            padded = f" {word} "
+            for i in range(len(padded) - self.char_ngram + 1):
+                yield "c:" + padded[i:i + self.char_ngram], self.char_weight
+
+    def transform(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = zlib.crc32(feature.encode())
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dim] += sign * weight
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+
+class SemanticIndex:
+    """Nearest-neighbour lookup from topics to existing exact-cache keys.
+
+    The index does not hold explanations. A hit returns the cache key of a
+    similar topic already answered at the same level and prompt version;
+    the caller then reads that key from the exact cache. Each namespace
+    (level + prompt version) has its own matrix, so answers never cross
+    levels or prompt versions. Rows are reused round-robin once
+    ``max_entries`` is reached.
+    """
+
+    name = "semantic"
+
+    def __init__(self, max_entries=5_000, dim=512, thresholds=None):
+        self.vectorizer = HashingVectorizer(dim=dim)
+        self.max_entries = max_entries
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        self.thresholds.update(thresholds or {})
+        self._indexes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def threshold(self, level):
+        return self.thresholds.get(level, max(self.thresholds.values()))
+
+    def _index(self, namespace):
+        index = self._indexes.get(namespace)
+        if index is None:
+            index = {
+                "matrix": np.zeros((16, self.vectorizer.dim), dtype=np.float32),
+                "keys": [],
+                "rows": {},
+                "next": 0,
+            }
+            self._indexes[namespace] = index
+        return index
+
+    def add(self, topic, level, key):
+        index = self._index(key_namespace(level))
+        if key in index["rows"]:
+            return
+        vector = self.vectorizer.transform(normalize_topic(topic))
+
+        if len(index["keys"]) < self.max_entries:
+            row = len(index["keys"])
+            if row == len(index["matrix"]):
+                grown = min(self.max_entries, row * 2)
+                matrix = np.zeros((grown, self.vectorizer.dim), dtype=np.float32)
+                matrix[:row] = index["matrix"]
+                index["matrix"] = matrix
+            index["keys"].append(key)
+        else:
+            row = index["next"]
+            index["next"] = (row + 1) % self.max_entries
+            evicted = index["keys"][row]
+            if index["rows"].get(evicted) == row:
+                del index["rows"][evicted]
+            index["keys"][row] = key
+
+        index["matrix"][row] = vector
+        index["rows"][key] = row
+
+    def lookup(self, topic, level):
+        """Return ``(key, score)`` for the closest topic above the threshold."""
+        index = self._indexes.get(key_namespace(level))
+        if not index or not index["keys"]:
+            self.misses += 1
+            return None, 0.0
+        vector = self.vectorizer.transform(normalize_topic(topic))
+        scores = index["matrix"][:len(index["keys"])] @ vector
+        row = int(np.argmax(scores))
+        score = float(scores[row])
+        if score < self.threshold(level) or index["keys"][row] is None:
+            self.misses += 1
+            return None, score
+        self.hits += 1
+        return index["keys"][row], score
+
+    def discard(self, key):
+        """Forget ``key`` after the exact cache no longer has it."""
+        for index in self._indexes.values():
+            row = index["rows"].pop(key, None)
+            if row is not None:
+                index["matrix"][row] = 0.0
+                index["keys"][row] = None
+                return True
+        return False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": sum(len(index["rows"]) for index in self._indexes.values()),
+            "bytes": sum(index["matrix"].nbytes for index in self._indexes.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "thresholds": self.thresholds,
+        }
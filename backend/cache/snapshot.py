@@ -0,0 +1,245 @@
+"""Export and import the explanation cache as a compact binary snapshot.
+
+Build the cache once (say, in staging), export it, ship the file with a
+deploy and load it at startup instead of paying for every answer again.
+
+File layout (all integers little-endian):
+
+    header   magic "ELI5SNAP", format version (u16), entry count (u32),
+             created_at (f64), length of the JSON metadata (u32)
+    metadata JSON: prompt version of every level at export time
+    body     zlib stream of records, each: record header (lengths, tokens,
+             timestamps) followed by key, topic, level, prompt version and
+             explanation as UTF-8
+
+Usage (from backend/, with the same CACHE_* settings as the app; exporting
+from the command line needs a persistent tier such as sqlite, mmap or redis):
+
+    python -m cache.snapshot export cache.snap
+    python -m cache.snapshot import cache.snap
+    python -m cache.snapshot info cache.snap
+"""
+import argparse
+import asyncio
+import json
+import os
+import struct
+import time
+import zlib
+from dataclasses import replace
+
+import prompts
+from cache.entry import CacheEntry
+
+MAGIC = b"ELI5SNAP"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHIdI")
+# key, topic, level, prompt version and explanation lengths, tokens, created, expires
+_RECORD = struct.Struct("<HHBBIIdd")
+_CHUNK = 1 << 20
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _encode(key, entry):
+    fields = [
+        key.encode(), entry.topic.encode(), entry.level.encode(),
+        entry.prompt_version.encode(), entry.explanation.encode(),
+    ]
+    return _RECORD.pack(
+        *(len(field) for field in fields), entry.tokens_used, entry.created_at, entry.expires_at,
+    ) + b"".join(fields)
+
+
+def _write_records(f, compressor, items):
+    """Compress and write ``items``; returns how many were written."""
+    records = []
+    for key, entry in items:
+        try:
+            records.append(compressor.compress(_encode(key, entry)))
+        except struct.error:
+            # Key or topic too long for the 16-bit length fields.
+            continue
+    f.write(b"".join(records))
+    return len(records)
+
+
+def _finish_snapshot(f, compressor, count):
+    f.write(compressor.flush())
+    # Patch the entry count now that it is known.
+    f.seek(len(MAGIC) + 2)
+    f.write(struct.pack("<I", count))
+
+
+async def export_snapshot(cache, path, level=6, batch_size=1_000):
+    """Write every live entry of ``cache`` to ``path``; returns the count.
+
+    Entries whose key or topic is too long for the record format are skipped.
+
+    Entries are compressed and written in batches on a worker thread, so a
+    large export does not hold up requests on the event loop.
+    """
+    compressor = zlib.compressobj(level)
+    count = 0
+    batch = []
+    try:
+        with open(path + ".tmp", "wb") as f:
+            metadata = json.dumps({"prompt_versions": prompts.prompt_versions()}).encode()
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, time.time(), len(metadata)))
+            f.write(metadata)
+            async for key, entry in cache.items():
+                batch.append((key, entry))
+                if len(batch) >= batch_size:
+                    count += await asyncio.to_thread(_write_records, f, compressor, batch)
+                    batch = []
+            count += await asyncio.to_thread(_write_records, f, compressor, batch)
+            await asyncio.to_thread(_finish_snapshot, f, compressor, count)
+        os.replace(path + ".tmp", path)
+    except BaseException:
+        if os.path.exists(path + ".tmp"):
+            os.unlink(path + ".tmp")
+        raise
+    return count
+
+
+def read_header(f):
+    raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        raise SnapshotError("File is too short to be a cache snapshot")
+    magic, version, count, created_at, metadata_length = _HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise SnapshotError("Not an ELI5.ai cache snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format version {version}")
+    try:
+        metadata = json.loads(f.read(metadata_length))
+    except ValueError as e:
+        raise SnapshotError(f"Snapshot metadata is corrupt: {e}") from e
+    if not isinstance(metadata, dict):
+        raise SnapshotError("Snapshot metadata is corrupt")
+    return {"format_version": version, "entries": count, "created_at": created_at, **metadata}
+
+
+def iter_records(f):
+    """Yield ``(key, entry)`` from the compressed body, decoding as it streams."""
+    decompressor = zlib.decompressobj()
+    buffer = b""
+    while True:
+        chunk = f.read(_CHUNK)
+        try:
+            buffer += decompressor.decompress(chunk) if chunk else decompressor.flush()
+        except zlib.error as e:
+            raise SnapshotError(f"Snapshot body is corrupt: {e}") from e
+        pos = 0
+        while len(buffer) - pos >= _RECORD.size:
+            key_len, topic_len, level_len, version_len, text_len, tokens, created, expires = \
+                _RECORD.unpack_from(buffer, pos)
+            end = pos + _RECORD.size + key_len + topic_len + level_len + version_len + text_len
+            if end > len(buffer):
+                break
+            cursor = pos + _RECORD.size
+            values = []
+            for length in (key_len, topic_len, level_len, version_len, text_len):
+                try:
+                    values.append(buffer[cursor:cursor + length].decode())
+                except UnicodeDecodeError as e:
+                    raise SnapshotError(f"Snapshot record is corrupt: {e}") from e
+                cursor += length
+            key, topic, level, version, text = values
+            yield key, CacheEntry(
+                topic=topic, level=level, explanation=text, tokens_used=tokens,
+                prompt_version=version, created_at=created, expires_at=expires,
+            )
+            pos = end
+        buffer = buffer[pos:]
+        if not chunk:
+            if buffer or not decompressor.eof:
+                raise SnapshotError("Snapshot is truncated")
+            return
+
+
+def _read_snapshot(path, keep_expiry):
+    """Parse a snapshot, keeping only entries for the current prompt versions."""
+    versions = prompts.prompt_versions()
+    now = time.time()
+    items, outdated = [], 0
+    with open(path, "rb") as f:
+        header = read_header(f)
+        for key, entry in iter_records(f):
+            if versions.get(entry.level) != entry.prompt_version:
+                outdated += 1
+                continue
+            if not keep_expiry:
+                # Restart the clock so each tier applies its own TTL from now.
+                entry = replace(entry, created_at=now, expires_at=0.0)
+            items.append((key, entry))
+    if len(items) + outdated != header["entries"]:
+        raise SnapshotError(
+            f"Snapshot has {len(items) + outdated} entries, its header says {header['entries']}"
+        )
+    return header, items, outdated
+
+
+async def import_snapshot(cache, path, keep_expiry=False, batch_size=5_000):
+    """Bulk-load a snapshot into ``cache``.
+
+    Entries made under a prompt version that no longer matches the current
+    config are skipped: their keys could never be hit again.
+    """
+    started = time.perf_counter()
+    header, items, outdated = await asyncio.to_thread(_read_snapshot, path, keep_expiry)
+    for start in range(0, len(items), batch_size):
+        await cache.set_many(items[start:start + batch_size])
+    return {
+        "loaded": len(items),
+        "skipped_outdated": outdated,
+        "snapshot_created_at": header["created_at"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+async def _main(args):
+    if args.command == "info":
+        with open(args.path, "rb") as f:
+            print(json.dumps(read_header(f), indent=2))
+        return
+
+    from cache import create_cache
+
+    cache = create_cache()
+    if args.command == "export" and cache.name == "memory":
+        # A new process starts with an empty memory cache.
+        raise SystemExit(
+            "Nothing to export with CACHE_TIERS=memory; "
+            "use GET /admin/cache/export on the running app instead"
+        )
+    await cache.start()
+    try:
+        if args.command == "export":
+            started = time.perf_counter()
+            count = await export_snapshot(cache, args.path)
+            print(f"Exported {count} entries to {args.path} in {time.perf_counter() - started:.2f}s")
+        else:
+            result = await import_snapshot(cache, args.path, keep_expiry=args.keep_expiry)
+            print(
+                f"Loaded {result['loaded']} entries "
+                f"({result['skipped_outdated']} outdated skipped) in {result['seconds']}s"
+            )
+    finally:
+        await cache.close()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Export or import an explanation cache snapshot.")
+    parser.add_argument("command", choices=["export", "import", "info"])
+    parser.add_argument("path")
+    parser.add_argument(
+        "--keep-expiry", action="store_true",
+        help="keep the exported expiry times instead of restarting each entry's TTL",
+    )
+    asyncio.run(_main(parser.parse_args()))
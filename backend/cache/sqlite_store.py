@@ -0,0 +1,263 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache.entry import CacheEntry, with_ttl
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS explanations (
+    key TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    level TEXT NOT NULL,
+    explanation TEXT NOT NULL,
+    tokens_used INTEGER NOT NULL,
+    prompt_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    stale_until REAL NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_explanations_expires_at ON explanations (expires_at);
+CREATE INDEX IF NOT EXISTS idx_explanations_version ON explanations (level, prompt_version);
+"""
+
+_COLUMNS = "key, topic, level, explanation, tokens_used, prompt_version, created_at, expires_at, stale_until"
+
+# Columns added after the first release, applied to existing files on open.
+_MIGRATIONS = {
+    "stale_until": "ALTER TABLE explanations ADD COLUMN stale_until REAL NOT NULL DEFAULT 0",
+}
+
+
+class SQLiteCache:
+    """Durable explanation cache in a WAL-mode SQLite file.
+
+    All database work runs on one dedicated thread, so the event loop never
+    blocks on disk. Writes are queued in memory and flushed in batches (one
+    transaction per batch) every ``flush_interval`` seconds or once
+    ``batch_size`` writes are pending; reads see queued writes immediately.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path="eli5_cache.db", ttl=30 * 86_400, grace=0, batch_size=256, flush_interval=0.05):
+        self.path = path
+        self.ttl = ttl
+        self.grace = grace
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-cache")
+        self._conn = None
+        self._pending = {}
+        self._wakeup = None
+        self._flusher = None
+        self.entries = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.writes = 0
+        self.batches = 0
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(explanations)")}
+        for column, statement in _MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(statement)
+        self._conn = conn
+        self.entries = conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+
+    async def start(self):
+        if self._conn is None:
+            await self._run(self._open)
+        self._wakeup = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending or self._conn is None:
+            return
+        batch, self._pending = self._pending, {}
+        await self._run(self._write_batch, batch)
+
+    def _write_batch(self, batch):
+        upserts = [self._row(key, entry) for key, entry in batch.items() if entry is not None]
+        deletes = [(key,) for key, entry in batch.items() if entry is None]
+        added = removed = 0
+        with self._conn:
+            self._conn.execute("BEGIN")
+            if upserts:
+                # Only keys not already stored grow the table; the lookup is
+                # by primary key, unlike a COUNT(*) over the whole table.
+                added = len(upserts) - self._count_existing([row[0] for row in upserts])
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO explanations ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    upserts,
+                )
+            if deletes:
+                removed = self._conn.executemany("DELETE FROM explanations WHERE key = ?", deletes).rowcount
+        self.entries += added - removed
+        self.writes += len(batch)
+        self.batches += 1
+
+    def _count_existing(self, keys):
+        count = 0
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            count += self._conn.execute(
+                f"SELECT COUNT(*) FROM explanations WHERE key IN ({placeholders})", chunk
+            ).fetchone()[0]
+        return count
+
+    @staticmethod
+    def _row(key, entry):
+        return (
+            key, entry.topic, entry.level, entry.explanation, entry.tokens_used,
+            entry.prompt_version, entry.created_at, entry.expires_at, entry.stale_until,
+        )
+
+    def _queue(self, key, entry):
+        self._pending[key] = entry
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if len(self._pending) >= self.batch_size:
+            asyncio.ensure_future(self.flush())
+
+    def _select(self, key):
+        return self._conn.execute(
+            f"SELECT {_COLUMNS} FROM explanations WHERE key = ?", (key,)
+        ).fetchone()
+
+    async def get(self, key):
+        if key in self._pending:
+            entry = self._pending[key]
+        else:
+            row = await self._run(self._select, key)
+            entry = CacheEntry(*row[1:]) if row else None
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.is_dead():
+            self._queue(key, None)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def _select_many(self, keys):
+        placeholders = ", ".join("?" * len(keys))
+        return self._conn.execute(
+            f"SELECT {_COLUMNS} FROM explanations WHERE key IN ({placeholders})", keys
+        ).fetchall()
+
+    async def get_many(self, keys):
+        found = {key: self._pending[key] for key in keys if self._pending.get(key) is not None}
+        missing = [key for key in keys if key not in self._pending]
+        for start in range(0, len(missing), 500):
+            for row in await self._run(self._select_many, missing[start:start + 500]):
+                found[row[0]] = CacheEntry(*row[1:])
+        now = time.time()
+        for key in list(found):
+            if found[key].is_dead(now):
+                del found[key]
+                self.expirations += 1
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def set(self, key, entry):
+        self._queue(key, with_ttl(entry, self.ttl, self.grace))
+        return True
+
+    async def set_many(self, items):
+        """Bulk write straight to the database in one transaction."""
+        await self.flush()
+        batch = {key: with_ttl(entry, self.ttl, self.grace) for key, entry in items}
+        await self._run(self._write_batch, batch)
+        return True
+
+    def _select_after(self, after, limit):
+        return self._conn.execute(
+            f"SELECT {_COLUMNS} FROM explanations WHERE key > ? ORDER BY key LIMIT ?",
+            (after, limit),
+        ).fetchall()
+
+    async def items(self, chunk_size=1_000):
+        await self.flush()
+        now = time.time()
+        after = ""
+        while True:
+            rows = await self._run(self._select_after, after, chunk_size)
+            for row in rows:
+                entry = CacheEntry(*row[1:])
+                if not entry.is_dead(now):
+                    yield row[0], entry
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1][0]
+
+    async def delete(self, key):
+        self._queue(key, None)
+        return True
+
+    async def clear(self):
+        self._pending.clear()
+        await self._run(self._conn.execute, "DELETE FROM explanations")
+        self.entries = 0
+
+    async def purge_expired(self, now=None):
+        def purge():
+            with self._conn:
+                cursor = self._conn.execute(
+                    "DELETE FROM explanations WHERE expires_at > 0 AND MAX(expires_at, stale_until) <= ?",
+                    (now or time.time(),),
+                )
+            self.entries -= cursor.rowcount
+            return cursor.rowcount
+
+        removed = await self._run(purge)
+        self.expirations += removed
+        return removed
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": self.entries,
+            "pending_writes": len(self._pending),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expirations": self.expirations,
+            "writes": self.writes,
+            "write_batches": self.batches,
+        }
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import prompts
+
+
+class VersionSweeper:
+    """Purges cached explanations made with an outdated prompt version.
+
+    Keys already include the prompt version, so outdated entries are never
+    served; they only take up space, mostly in the persistent tiers that
+    outlive a deploy. The sweep walks the cache slowly, deleting in batches
+    of ``batch_size`` with a ``pause`` between them, once ``start_delay``
+    seconds after startup and then every ``interval`` seconds (if set), which
+    also catches entries written by older instances during a rolling deploy.
+    """
+
+    def __init__(self, cache, interval=3_600, start_delay=60.0, batch_size=500, pause=0.05):
+        self.cache = cache
+        self.interval = interval
+        self.start_delay = start_delay
+        self.batch_size = batch_size
+        self.pause = pause
+        self._task = None
+        self.runs = 0
+        self.scanned = 0
+        self.purged = 0
+        self.last_run_at = None
+        self.last_run_seconds = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        await asyncio.sleep(self.start_delay)
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                print(f"⚠️  Warning: cache version sweep failed: {e}")
+            if not self.interval:
+                return
+            await asyncio.sleep(self.interval)
+
+    async def run(self):
+        """Delete every entry whose level has since been given a new prompt version."""
+        self.runs += 1
+        self.last_run_at = time.time()
+        versions = prompts.prompt_versions()
+        outdated = []
+        async for key, entry in self.cache.items():
+            self.scanned += 1
+            if versions.get(entry.level) != entry.prompt_version:
+                outdated.append(key)
+            if len(outdated) >= self.batch_size:
+                await self._purge(outdated)
+                outdated = []
+        await self._purge(outdated)
+        self.last_run_seconds = round(time.time() - self.last_run_at, 3)
+
+    async def _purge(self, keys):
+        for key in keys:
+            await self.cache.delete(key)
+        self.purged += len(keys)
+        # Leave room for live requests between batches.
+        await asyncio.sleep(self.pause)
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "last_run_seconds": self.last_run_seconds,
+            "scanned": self.scanned,
+            "purged": self.purged,
+            "interval": self.interval,
+        }
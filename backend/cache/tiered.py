@@ -0,0 +1,145 @@
+import time
+from collections import OrderedDict
+
+
+class TieredCache:
+    """Chain of cache tiers, fastest first.
+
+    A lookup walks the tiers in order; a hit in a lower tier is copied into
+    every tier above it, so the next lookup is served by the fastest one.
+    Writes go to every tier. An expired hit in an upper tier is only served
+    when no lower tier holds a fresher copy.
+
+    A key that missed every tier is remembered for ``negative_ttl`` seconds,
+    during which lookups stop at the first tier instead of paying a round
+    trip to the lower ones again. Writing the key clears the mark.
+    """
+
+    def __init__(self, tiers, negative_ttl=2.0, max_negative=10_000):
+        self.tiers = list(tiers)
+        self.name = "+".join(tier.name for tier in self.tiers)
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self._negative = OrderedDict()
+        self.negative_hits = 0
+
+    async def start(self):
+        for tier in self.tiers:
+            await tier.start()
+
+    async def close(self):
+        for tier in self.tiers:
+            await tier.close()
+
+    def _known_missing(self, key, now):
+        expires_at = self._negative.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= now:
+            del self._negative[key]
+            return False
+        self.negative_hits += 1
+        return True
+
+    def _remember_missing(self, keys, now):
+        if not self.negative_ttl:
+            return
+        for key in keys:
+            self._negative[key] = now + self.negative_ttl
+            self._negative.move_to_end(key)
+        while len(self._negative) > self.max_negative:
+            self._negative.popitem(last=False)
+
+    async def _promote(self, depth, items):
+        for upper in self.tiers[:depth]:
+            for key, entry in items.items():
+                await upper.set(key, entry)
+
+    async def get(self, key):
+        now = time.time()
+        expired = None
+        for depth, tier in enumerate(self.tiers):
+            if depth and expired is None and self._known_missing(key, now):
+                return None
+            entry = await tier.get(key)
+            if entry is None:
+                continue
+            if entry.is_expired(now) and depth + 1 < len(self.tiers):
+                expired = expired or entry
+                continue
+            await self._promote(depth, {key: entry})
+            return entry
+        if expired is None:
+            self._remember_missing([key], now)
+        return expired
+
+    async def get_many(self, keys):
+        """Look up ``keys`` with one batched call per tier."""
+        now = time.time()
+        found = {}
+        expired = {}
+        remaining = list(keys)
+        for depth, tier in enumerate(self.tiers):
+            if depth:
+                remaining = [
+                    key for key in remaining if key in expired or not self._known_missing(key, now)
+                ]
+            if not remaining:
+                break
+            hits = await tier.get_many(remaining)
+            if depth + 1 < len(self.tiers):
+                for key, entry in list(hits.items()):
+                    if entry.is_expired(now):
+                        expired.setdefault(key, entry)
+                        del hits[key]
+            if hits:
+                await self._promote(depth, hits)
+                found.update(hits)
+                remaining = [key for key in remaining if key not in hits]
+        self._remember_missing([key for key in remaining if key not in expired], now)
+        for key in remaining:
+            if key in expired:
+                found[key] = expired[key]
+        return found
+
+    async def set(self, key, entry):
+        self._negative.pop(key, None)
+        stored = False
+        for tier in self.tiers:
+            stored = await tier.set(key, entry) or stored
+        return stored
+
+    async def set_many(self, items):
+        items = list(items)
+        for key, _ in items:
+            self._negative.pop(key, None)
+        for tier in self.tiers:
+            await tier.set_many(items)
+        return True
+
+    async def items(self):
+        """Yield each cached key once, from the most complete (lowest) tier."""
+        seen = set()
+        for tier in reversed(self.tiers):
+            async for key, entry in tier.items():
+                if key not in seen:
+                    seen.add(key)
+                    yield key, entry
+
+    async def delete(self, key):
+        deleted = False
+        for tier in self.tiers:
+            deleted = await tier.delete(key) or deleted
+        return deleted
+
+    async def clear(self):
+        self._negative.clear()
+        for tier in self.tiers:
+            await tier.clear()
+
+    def stats(self):
+        return {
+            "tiers": {tier.name: tier.stats() for tier in self.tiers},
+            "negative_entries": len(self._negative),
+            "negative_hits": self.negative_hits,
+        }
@@ -1,13 +1,182 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hashlib
+import json
+import secrets
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from openai import OpenAI
+from starlette.background import BackgroundTask
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="ELI5.ai API")
+import prompts
+import upstream
+from cache import (
+    STALE_WHILE_REVALIDATE,
+    CacheEntry,
+    create_cache,
+    create_semantic_index,
+    create_sweeper,
+    make_key,
+    normalize_topic,
+)
+from cache.snapshot import SnapshotError, export_snapshot, import_snapshot
+from metrics import CacheMetrics, CancellationMetrics, PromptCacheMetrics, StreamMetrics
+from prefetch import Prefetcher
+from settings import env_bool, env_float, env_int, env_str
+from singleflight import SingleFlight
+from streams import StreamRegistry
+from warmer import CacheWarmer, load_topics
+
+api_key = os.getenv("OPENAI_API_KEY")
+if not api_key:
+    print("⚠️  Warning: No API key found! Set OPENAI_API_KEY in .env file")
+
+admin_token = os.getenv("ADMIN_TOKEN")
+
+# Longer topics are rejected: they are not real questions, and the cache
+# stores record topic lengths in 16 bits.
+MAX_TOPIC_LENGTH = env_int("MAX_TOPIC_LENGTH", 500)
+
+# Cache-Control for GET /explain/{complexity}, for browsers and CDNs.
+HTTP_MAX_AGE = env_int("HTTP_CACHE_MAX_AGE", 3_600)
+HTTP_STALE_WHILE_REVALIDATE = env_int("HTTP_CACHE_STALE_WHILE_REVALIDATE", 86_400)
+HTTP_STALE_IF_ERROR = env_int("HTTP_CACHE_STALE_IF_ERROR", 86_400)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One async client per process, shared by every request so upstream
+    # calls overlap on the event loop instead of blocking it.
+    app.state.http_client = upstream.create_http_client()
+    app.state.client = (
+        upstream.create_openai_client(api_key, app.state.http_client) if api_key else None
+    )
+    app.state.singleflight = SingleFlight()
+    app.state.metrics = CacheMetrics(prompts.complexity_configs, upstream.COST_PER_TOKEN)
+    app.state.stream_metrics = StreamMetrics()
+    app.state.cancellations = CancellationMetrics(upstream.COST_PER_TOKEN)
+    app.state.streams = StreamRegistry(
+        replay_seconds=env_float("STREAM_REPLAY_SECONDS", 60.0),
+        max_events=env_int("STREAM_REPLAY_MAX_EVENTS", 4_096),
+        max_streams=env_int("STREAM_REPLAY_MAX_STREAMS", 1_000),
+        idle_grace=env_float("STREAM_CANCEL_GRACE_SECONDS", 5.0),
+    )
+    app.state.prompt_cache = PromptCacheMetrics(
+        prompts.complexity_configs, upstream.COST_PER_TOKEN, upstream.CACHED_PROMPT_DISCOUNT
+    )
+    app.state.cache = create_cache()
+    app.state.semantic = create_semantic_index()
+    app.state.revalidating = set()
+    app.state.background_tasks = set()
+    await app.state.cache.start()
+    await load_startup_snapshot(app.state.cache)
+    app.state.sweeper = create_sweeper(app.state.cache)
+    if app.state.sweeper:
+        app.state.sweeper.start()
+    app.state.warmer = create_warmer(app.state.client)
+    if app.state.warmer:
+        app.state.warmer.start()
+    app.state.prefetcher = create_prefetcher(app.state.client)
+    if app.state.prefetcher:
+        app.state.prefetcher.start()
+    try:
+        yield
+    finally:
+        if app.state.warmer:
+            await app.state.warmer.stop()
+        if app.state.sweeper:
+            await app.state.sweeper.stop()
+        if app.state.prefetcher:
+            await app.state.prefetcher.stop()
+        await app.state.streams.close()
+        for task in list(app.state.background_tasks):
+            task.cancel()
+        await asyncio.gather(*app.state.background_tasks, return_exceptions=True)
+        await app.state.cache.close()
+        await app.state.http_client.aclose()
+
+async def load_startup_snapshot(cache):
+    path = env_str("CACHE_SNAPSHOT_PATH")
+    if not path or not os.path.exists(path):
+        return
+    try:
+        result = await import_snapshot(cache, path)
+    except (OSError, SnapshotError) as e:
+        print(f"⚠️  Warning: could not load cache snapshot {path}: {e}")
+        return
+    print(f"📦 Loaded {result['loaded']} cached explanations from {path} in {result['seconds']}s")
+
+
+def create_warmer(client):
+    """Background cache warmer, when WARM_CACHE is on and an API key is set."""
+    if not client or not env_bool("WARM_CACHE"):
+        return None
+    default_file = os.path.join(os.path.dirname(__file__), "warm_topics.txt")
+    path = env_str("WARM_TOPICS_FILE", default_file)
+    try:
+        topics = load_topics(path, env_int("WARM_TOP_N", 0))
+    except (OSError, ValueError) as e:
+        # Warming is optional; a bad topic list must not stop the app.
+        print(f"⚠️  Warning: cache warming disabled: {e}")
+        return None
+    levels = [
+        prompts.resolve_level(level.strip())
+        for level in env_str("WARM_LEVELS", prompts.DEFAULT_COMPLEXITY).split(",")
+        if level.strip()
+    ]
+    # WARM_MAX_COST (dollars) caps the run too, whichever limit is lower.
+    max_tokens = env_int("WARM_MAX_TOKENS", 20_000)
+    max_cost = env_float("WARM_MAX_COST", 0.0)
+    if max_cost:
+        max_tokens = min(max_tokens, int(max_cost / upstream.COST_PER_TOKEN))
+
+    return CacheWarmer(
+        app.state.cache,
+        background_generator(client),
+        topics,
+        levels,
+        concurrency=env_int("WARM_CONCURRENCY", 2),
+        max_tokens=max_tokens,
+        interval=env_float("WARM_INTERVAL_SECONDS", 0.0),
+        start_delay=env_float("WARM_START_DELAY_SECONDS", 5.0),
+        inflight=app.state.singleflight.inflight,
+        busy_threshold=env_int("WARM_BUSY_THRESHOLD", 4),
+    )
+
+
+def create_prefetcher(client):
+    """Speculative prefetch of neighbouring levels, when PREFETCH is on."""
+    if not client or not env_bool("PREFETCH"):
+        return None
+    return Prefetcher(
+        app.state.cache,
+        background_generator(client),
+        tokens_per_minute=env_int("PREFETCH_TOKENS_PER_MINUTE", 5_000),
+        concurrency=env_int("PREFETCH_CONCURRENCY", 1),
+        queue_size=env_int("PREFETCH_QUEUE_SIZE", 100),
+        inflight=app.state.singleflight.inflight,
+        busy_threshold=env_int("PREFETCH_BUSY_THRESHOLD", 4),
+    )
+
+
+def background_generator(client):
+    """``generate(key, level, topic)`` for background work, coalesced with live requests."""
+    def generate(key, level, topic):
+        return app.state.singleflight.do(
+            key,
+            lambda: generate_and_cache(client, key, level, topic)
+        )
+    return generate
+
+
+app = FastAPI(title="ELI5.ai API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,10 +186,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    print("⚠️  Warning: No API key found! Set OPENAI_API_KEY in .env file")
-client = OpenAI(api_key=api_key) if api_key else None
+
+def require_admin(x_admin_token: str = Header(default=None)):
+    if not admin_token:
+        raise HTTPException(
+            status_code=403,
+            detail="Admin endpoints are disabled. Set ADMIN_TOKEN to enable them"
+        )
+    if not secrets.compare_digest(x_admin_token or "", admin_token):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid admin token"
+        )
+
+
+def require_client():
+    """The OpenAI client, or a 500 when no API key is configured."""
+    if not app.state.client:
+        raise HTTPException(
+            status_code=500,
+            detail="API key not configured. Please set OPENAI_API_KEY in .env file"
+        )
+    return app.state.client
+
+
+def validated_topic(topic):
+    """``topic`` without surrounding whitespace, or a 400 if it is empty or too long."""
+    topic = (topic or "").strip()
+    if not topic:
+        raise HTTPException(
+            status_code=400,
+            detail="Please provide a topic to explain"
+        )
+    if len(topic) > MAX_TOPIC_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Topic is too long (at most {MAX_TOPIC_LENGTH} characters)"
+        )
+    return topic
 
 
 class ExplainRequest(BaseModel):
@@ -28,6 +231,10 @@ class ExplainRequest(BaseModel):
     complexity: str = "eli5"
 
 
+class ExplainAllRequest(BaseModel):
+    topic: str
+
+
 @app.get("/")
 async def root():
     return {
@@ -36,6 +243,9 @@ async def root():
         "model": "GPT-4o-mini (Optimized)",
         "endpoints": {
             "/explain": "POST - Get ELI5 explanation",
+            "/explain/{complexity}?topic=...": "GET - Cacheable explanation (ETag)",
+            "/explain/all": "POST - Every complexity level in one call",
+            "/explain/stream?topic=...&complexity=...": "GET - Stream an explanation (SSE)",
             "/health": "GET - Check server health"
         }
     }
@@ -43,92 +253,571 @@ async def root():
 
 @app.get("/health")
 async def health():
-    api_status = "connected" if client else "no API key"
+    api_status = "connected" if app.state.client else "no API key"
     return {
         "status": "healthy",
         "api": api_status,
-        "model": "GPT-4o-mini"
+        "model": "GPT-4o-mini",
+        "pool": upstream.pool_stats(app.state.http_client),
+        "coalescing": app.state.singleflight.stats(),
+        "cache": app.state.cache.stats(),
+        "semantic_cache": app.state.semantic.stats() if app.state.semantic else None,
+        "warmer": app.state.warmer.stats() if app.state.warmer else None,
+        "version_sweep": app.state.sweeper.stats() if app.state.sweeper else None,
+        "prefetch": app.state.prefetcher.stats() if app.state.prefetcher else None,
+        "streaming": {**app.state.stream_metrics.stats(), **app.state.streams.stats()},
+        "cancellation": app.state.cancellations.stats()
     }
 
 
 @app.post("/explain")
-async def explain_topic(request: ExplainRequest):
-    if not client:
-        raise HTTPException(
-            status_code=500,
-            detail="API key not configured. Please set OPENAI_API_KEY in .env file"
+async def explain_topic(request: ExplainRequest, raw_request: Request):
+    client = require_client()
+    topic = validated_topic(request.topic)
+
+    level = prompts.resolve_level(request.complexity)
+    explanation, tokens_used, _, flags = await until_disconnected(
+        raw_request, answer(client, level, topic)
+    )
+    if app.state.prefetcher:
+        app.state.prefetcher.schedule(level, topic)
+    return explain_payload(request, explanation, tokens_used, **flags)
+
+
+@app.post("/explain/all")
+async def explain_all_levels(request: ExplainAllRequest, raw_request: Request):
+    """Every complexity level for one topic, generated in a single upstream call.
+
+    Levels already cached are served from the cache; the rest are requested
+    together and each cached under its own key. Any level the combined reply
+    lacks falls back to a normal single-level call.
+    """
+    client = require_client()
+    topic = validated_topic(request.topic)
+    return await until_disconnected(raw_request, answer_all(client, request, topic))
+
+
+async def answer_all(client, request, topic):
+    levels = list(prompts.complexity_configs)
+    keys = {level: make_key(topic, level) for level in levels}
+    found = await app.state.cache.get_many(list(keys.values()))
+    answers, billed_tokens = {}, 0
+    for level in levels:
+        entry = found.get(keys[level])
+        if entry and not entry.is_expired():
+            app.state.metrics.record(level, "hit", entry.tokens_used)
+            answers[level] = explain_level(entry.explanation, entry.tokens_used, cached=True)
+
+    missing = [level for level in levels if level not in answers]
+    if missing:
+        try:
+            result, coalesced = await app.state.singleflight.do(
+                f"all:{','.join(missing)}:{normalize_topic(topic)}",
+                lambda: generate_all_and_cache(client, keys, missing, topic)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error: {str(e)}"
+            )
+        if not coalesced:
+            billed_tokens += result["tokens_used"]
+        for level, generated in result["levels"].items():
+            app.state.metrics.record(
+                level, "coalesced" if coalesced else "miss", generated["tokens_used"]
+            )
+            answers[level] = explain_level(
+                generated["explanation"], generated["tokens_used"], coalesced=coalesced
+            )
+
+    leftover = [level for level in levels if level not in answers]
+    if leftover:
+        results = await asyncio.gather(*(answer(client, level, topic) for level in leftover))
+        for level, (explanation, tokens_used, _, flags) in zip(leftover, results):
+            if not flags.get("cached") and not flags.get("coalesced"):
+                billed_tokens += tokens_used
+            answers[level] = explain_level(explanation, tokens_used, **flags)
+
+    return {
+        "success": True,
+        "topic": request.topic,
+        "explanations": {level: answers[level] for level in levels},
+        "tokens_used": sum(answers[level]["tokens_used"] for level in levels),
+        "model": "GPT-4o-mini",
+        "cost": f"${billed_tokens * upstream.COST_PER_TOKEN:.6f}"
+    }
+
+
+def explain_level(explanation, tokens_used, cached=False, coalesced=False, stale=False):
+    return {
+        "explanation": explanation,
+        "tokens_used": tokens_used,
+        "cached": cached,
+        "coalesced": coalesced,
+        "stale": stale
+    }
+
+
+# Registered before /explain/{complexity}, which would otherwise match it.
+@app.get("/explain/stream")
+async def explain_stream(
+    topic: str = "",
+    complexity: str = "eli5",
+    last_event_id: str = Header(default=None)
+):
+    """Stream an explanation as Server-Sent Events.
+
+    ``token`` events carry ``{"text": ...}`` pieces as they are generated;
+    a final ``done`` event carries tokens used, cost and timings, or an
+    ``error`` event carries ``{"detail": ...}``. Cached answers arrive as a
+    single ``token`` event.
+
+    Generated events have ``<stream id>:<n>`` IDs. A client that reconnects
+    with ``Last-Event-ID`` (EventSource does so by itself) is replayed the
+    rest of the same stream instead of starting a new generation.
+    """
+    client = require_client()
+    topic = validated_topic(topic)
+    level = prompts.resolve_level(complexity)
+    return StreamingResponse(
+        stream_events(client, level, topic, last_event_id),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx from holding events back.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def sse(event, data, event_id=None):
+    prefix = f"id: {event_id}\n" if event_id else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_events(client, level, topic, last_event_id=None):
+    started = time.perf_counter()
+    key = make_key(topic, level)
+    resumed = app.state.streams.resume(last_event_id, key)
+    joined = None if resumed else app.state.streams.join(key)
+    if resumed:
+        buffer, after, coalesced = resumed
+    elif joined:
+        # Someone is already generating this: replay it from the start and
+        # share the live tail instead of opening a second upstream stream.
+        buffer, after, coalesced = joined, 0, True
+        yield "retry: 1000\n\n"
+        yield sse("start", {})
+    else:
+        # Not a continuation of anything the client has (a new request, or a
+        # reconnect that could not be resumed): it drops any partial text.
+        yield sse("start", {})
+        cached_key, cached = await find_cached(key, topic, level)
+        if cached and time.time() < cached.expires_at + STALE_WHILE_REVALIDATE:
+            stale = cached.is_expired()
+            if stale:
+                revalidate(client, cached_key, cached)
+            app.state.metrics.record(level, "stale" if stale else "hit", cached.tokens_used)
+            yield sse("token", {"text": cached.explanation})
+            elapsed = time.perf_counter() - started
+            app.state.stream_metrics.record(elapsed, elapsed, cached=True)
+            yield sse("done", stream_summary(
+                cached.tokens_used, 0, elapsed, elapsed, cached=True, stale=stale
+            ))
+            if app.state.prefetcher:
+                app.state.prefetcher.schedule(level, topic)
+            return
+        # Another request may have started this stream while we looked in
+        # the cache; nothing is awaited between this check and start().
+        joined = app.state.streams.join(key)
+        buffer = joined or app.state.streams.start(
+            key, lambda buffer: produce_stream(buffer, client, key, level, topic, fallback=cached)
         )
-    
-    if not request.topic or len(request.topic.strip()) == 0:
+        after, coalesced = 0, joined is not None
+        # Ask EventSource to reconnect quickly after a dropped connection.
+        yield "retry: 1000\n\n"
+
+    # A reader sharing someone else's generation gets ":j" IDs, so it is
+    # still reported as coalesced after it reconnects.
+    suffix = ":j" if coalesced else ""
+    event = None
+    try:
+        async for index, event, data in buffer.follow(after):
+            if coalesced and event == "done":
+                app.state.metrics.record(level, "coalesced", data["tokens_used"])
+                data = {**data, "cost": f"${0:.6f}", "coalesced": True}
+            yield sse(event, data, f"{buffer.id}:{index}{suffix}")
+    except asyncio.CancelledError:
+        # The client went away; the stream is cancelled if nobody else
+        # reads or reconnects to it within the grace period.
+        app.state.cancellations.record_disconnect()
+        raise
+    if event == "done" and app.state.prefetcher:
+        app.state.prefetcher.schedule(level, topic)
+
+
+async def produce_stream(buffer, client, key, level, topic, fallback=None):
+    """Run one upstream stream into ``buffer``, then cache the answer.
+
+    If the upstream fails and there is an expired ``fallback`` entry, it is
+    sent instead of the error (stale-if-error), replacing any partial text.
+    """
+    started = time.perf_counter()
+    pieces, usage, ttft = [], None, None
+    try:
+        async for kind, value in upstream.stream_explain(client, level, topic):
+            if kind == "usage":
+                usage = value
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            pieces.append(value)
+            buffer.append("token", {"text": value})
+    except asyncio.CancelledError:
+        # Every reader left: closing the upstream stream stops generation.
+        budget = prompts.complexity_configs[level]["max_tokens"]
+        app.state.cancellations.record(max(0, budget - len(pieces)), streaming=True)
+        raise
+    except Exception as e:
+        app.state.stream_metrics.record_failure()
+        if fallback:
+            app.state.metrics.record(level, "stale", fallback.tokens_used)
+            if pieces:
+                buffer.append("start", {})
+            buffer.append("token", {"text": fallback.explanation})
+            elapsed = time.perf_counter() - started
+            buffer.append("done", stream_summary(
+                fallback.tokens_used, 0, elapsed, elapsed, cached=True, stale=True
+            ))
+            return
+        buffer.append("error", {"detail": f"Error: {str(e)}"})
+        return
+
+    duration = time.perf_counter() - started
+    app.state.stream_metrics.record(ttft, duration)
+    app.state.prompt_cache.record(level, usage["prompt_tokens"], usage["cached_tokens"], duration)
+    app.state.metrics.record(level, "miss", usage["tokens_used"])
+    await asyncio.shield(store(key, level, topic, "".join(pieces).strip(), usage["tokens_used"]))
+    buffer.append("done", stream_summary(usage["tokens_used"], usage["tokens_used"], ttft, duration))
+
+
+def stream_summary(tokens_used, billed_tokens, ttft, duration, cached=False, stale=False):
+    return {
+        "tokens_used": tokens_used,
+        "model": "GPT-4o-mini",
+        "cost": f"${billed_tokens * upstream.COST_PER_TOKEN:.6f}",
+        "cached": cached,
+        "coalesced": False,
+        "stale": stale,
+        "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+        "duration_ms": round(duration * 1000, 1)
+    }
+
+
+@app.get("/explain/{complexity}")
+async def explain_topic_get(
+    raw_request: Request,
+    complexity: str,
+    topic: str = "",
+    if_none_match: str = Header(default=None)
+):
+    """Cacheable GET variant of ``/explain`` with ETag and Cache-Control.
+
+    The body only depends on the cached answer, so browsers and CDNs can
+    store it and revalidate with ``If-None-Match``; a match is answered with
+    304 from the cache, without calling the upstream.
+    """
+    client = require_client()
+    if complexity not in prompts.complexity_configs:
         raise HTTPException(
-            status_code=400,
-            detail="Please provide a topic to explain"
+            status_code=404,
+            detail=f"Unknown complexity: {complexity}"
         )
-    
-    complexity_configs = {
-        "eli5": {
-            "instruction": "Explain in 5-10 sentences using simple words a 5-year-old would understand. Use a fun analogy.",
-            "max_tokens": 200,
-            "temperature": 0.7
-        },
-        "eli10": {
-            "instruction": "Explain in 3-4 sentences for a 10-year-old. Use clear, relatable examples. Break into 2 short paragraphs.",
-            "max_tokens": 200,
-            "temperature": 0.7
-        },
-        "teen": {
-            "instruction": "Explain in 4-5 sentences for a teenager. Include some detail but keep it interesting. Use 2 paragraphs.",
-            "max_tokens": 250,
-            "temperature": 0.7
-        },
-        "college": {
-            "instruction": "Provide a concise college-level explanation in 5-6 sentences. Use proper terminology. Structure in 2-3 short paragraphs.",
-            "max_tokens": 300,
-            "temperature": 0.6
-        },
-        "expert": {
-            "instruction": "Provide an expert-level technical explanation using advanced terminology, academic language, and field-specific jargon. Be precise and sophisticated. 3 paragraphs max. Sound impressive and authoritative.",
-            "max_tokens": 350,
-            "temperature": 0.5
-        }
+    # The response echoes the topic as sent; the cache key uses it stripped.
+    cleaned = validated_topic(topic)
+
+    explanation, tokens_used, expires_at, flags = await until_disconnected(
+        raw_request, answer(client, complexity, cleaned)
+    )
+    if app.state.prefetcher:
+        app.state.prefetcher.schedule(complexity, cleaned)
+    response = JSONResponse({
+        "success": True,
+        "topic": topic,
+        "complexity": complexity,
+        "explanation": explanation,
+        "tokens_used": tokens_used,
+        "model": "GPT-4o-mini"
+    })
+    etag = '"' + hashlib.sha256(response.body).hexdigest()[:32] + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control(expires_at),
+        "X-Cache": "STALE" if flags.get("stale") else "HIT" if flags.get("cached") else "MISS",
     }
-    
-    config = complexity_configs.get(request.complexity, complexity_configs["eli5"])
-    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
+def cache_control(expires_at=None):
+    """``Cache-Control`` for a GET answer, never fresher than our own copy."""
+    max_age = HTTP_MAX_AGE
+    if expires_at:
+        max_age = max(0, min(max_age, int(expires_at - time.time())))
+    return (
+        f"public, max-age={max_age}, "
+        f"stale-while-revalidate={HTTP_STALE_WHILE_REVALIDATE}, "
+        f"stale-if-error={HTTP_STALE_IF_ERROR}"
+    )
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+async def until_disconnected(request, work):
+    """Await ``work`` unless the client disconnects first, then cancel it.
+
+    Cancelling releases this request's hold on the upstream call; the call
+    itself is only cancelled once no other request is waiting on it (see
+    ``SingleFlight.do``). The client is gone, so the 499 is never read.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a concise AI tutor. Keep explanations SHORT and TO THE POINT. Always break longer answers into short paragraphs for readability. No fluff or unnecessary details."
-                },
-                {
-                    "role": "user",
-                    "content": f"{config['instruction']}\n\nTopic: {request.topic}\n\nBe concise and clear. Use paragraph breaks for readability."
-                }
-            ],
-            max_tokens=config["max_tokens"],
-            temperature=config["temperature"]
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if not task.done():
+        task.cancel()
+        app.state.cancellations.record_disconnect()
+        await asyncio.gather(task, return_exceptions=True)
+        raise HTTPException(
+            status_code=499,
+            detail="Client disconnected"
         )
-        
-        explanation = response.choices[0].message.content.strip()
-        
-        return {
-            "success": True,
-            "topic": request.topic,
-            "complexity": request.complexity,
-            "explanation": explanation,
-            "tokens_used": response.usage.total_tokens,
-            "model": "GPT-4o-mini",
-            "cost": f"${response.usage.total_tokens * 0.0000015:.6f}"
+    return task.result()
+
+
+async def wait_for_disconnect(request):
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def answer(client, level, topic):
+    """Return ``(explanation, tokens_used, expires_at, flags)``, cache first.
+
+    ``flags`` are the ``cached``/``coalesced``/``stale`` keywords for
+    :func:`explain_payload`; ``expires_at`` is set for cached answers.
+    """
+    key = make_key(topic, level)
+    cached_key, cached = await find_cached(key, topic, level)
+    metrics = app.state.metrics
+    if cached and not cached.is_expired():
+        metrics.record(level, "hit", cached.tokens_used)
+        return cached.explanation, cached.tokens_used, cached.expires_at, {"cached": True}
+    if cached and time.time() < cached.expires_at + STALE_WHILE_REVALIDATE:
+        # Expired but inside the grace window: answer now, refresh behind it.
+        revalidate(client, cached_key, cached)
+        metrics.record(level, "stale", cached.tokens_used)
+        return cached.explanation, cached.tokens_used, cached.expires_at, {
+            "cached": True, "stale": True
         }
-    
+
+    try:
+        result, coalesced = await app.state.singleflight.do(
+            key,
+            lambda: generate_and_cache(client, key, level, topic)
+        )
     except Exception as e:
+        if cached:
+            # stale-if-error: an old answer beats an error page.
+            metrics.record(level, "stale", cached.tokens_used)
+            return cached.explanation, cached.tokens_used, cached.expires_at, {
+                "cached": True, "stale": True
+            }
         raise HTTPException(
             status_code=500,
             detail=f"Error: {str(e)}"
         )
+    metrics.record(level, "coalesced" if coalesced else "miss", result["tokens_used"])
+    return result["explanation"], result["tokens_used"], None, {"coalesced": coalesced}
+
+
+async def find_cached(key, topic, level):
+    """Return ``(key, entry)`` from the exact cache, else the semantic tier."""
+    cached = await app.state.cache.get(key)
+    if cached or not app.state.semantic:
+        return key, cached
+    similar_key, _ = app.state.semantic.lookup(topic, level)
+    if not similar_key:
+        return key, None
+    cached = await app.state.cache.get(similar_key)
+    if not cached:
+        app.state.semantic.discard(similar_key)
+        return key, None
+    return similar_key, cached
+
+
+def revalidate(client, key, entry):
+    """Refresh a stale entry in the background, at most once per key at a time."""
+    if key in app.state.revalidating:
+        return
+    app.state.revalidating.add(key)
+    task = asyncio.create_task(_revalidate(client, key, entry))
+    app.state.background_tasks.add(task)
+    task.add_done_callback(app.state.background_tasks.discard)
+
+
+async def _revalidate(client, key, entry):
+    try:
+        await app.state.singleflight.do(
+            key,
+            lambda: generate_and_cache(client, key, entry.level, entry.topic)
+        )
+    except Exception as e:
+        # The stale entry stays in place and keeps being served.
+        print(f"⚠️  Warning: background refresh failed for {key}: {e}")
+    finally:
+        app.state.revalidating.discard(key)
+
+
+async def generate_all_and_cache(client, keys, levels, topic):
+    """One combined upstream call for ``levels``, cached per level.
+
+    The call's tokens are split between levels by answer length, so each
+    cached entry records roughly what it would have cost on its own.
+    """
+    started = time.perf_counter()
+    try:
+        result = await upstream.explain_all(client, levels, topic)
+    except asyncio.CancelledError:
+        app.state.cancellations.record(
+            sum(prompts.complexity_configs[level]["max_tokens"] for level in levels)
+        )
+        raise
+    app.state.prompt_cache.record(
+        "all", result["prompt_tokens"], result["cached_tokens"], time.perf_counter() - started
+    )
+    explanations = result["explanations"]
+    total_chars = sum(len(text) for text in explanations.values()) or 1
+    generated = {}
+    for level, text in explanations.items():
+        tokens_used = round(result["tokens_used"] * len(text) / total_chars)
+        await asyncio.shield(store(keys[level], level, topic, text, tokens_used))
+        generated[level] = {"explanation": text, "tokens_used": tokens_used}
+    return {"levels": generated, "tokens_used": result["tokens_used"]}
+
+
+async def generate_and_cache(client, key, level, topic):
+    started = time.perf_counter()
+    try:
+        result = await upstream.explain(client, level, topic)
+    except asyncio.CancelledError:
+        app.state.cancellations.record(prompts.complexity_configs[level]["max_tokens"])
+        raise
+    app.state.prompt_cache.record(
+        level, result["prompt_tokens"], result["cached_tokens"], time.perf_counter() - started
+    )
+    # Already paid for: finish caching it even if every caller has left.
+    await asyncio.shield(store(key, level, topic, result["explanation"], result["tokens_used"]))
+    return result
+
+
+async def store(key, level, topic, explanation, tokens_used):
+    """Cache a freshly generated explanation and index it for similar topics."""
+    entry = CacheEntry(
+        topic=topic,
+        level=level,
+        explanation=explanation,
+        tokens_used=tokens_used,
+        prompt_version=prompts.prompt_version(level)
+    )
+    await app.state.cache.set(key, entry)
+    if app.state.semantic:
+        app.state.semantic.add(topic, level, key)
+
+
+def explain_payload(request, explanation, tokens_used, cached=False, coalesced=False, stale=False):
+    # Cached and coalesced answers were paid for by an earlier request, so
+    # this one reports the tokens it reused but no cost of its own.
+    billed_tokens = 0 if cached or coalesced else tokens_used
+    return {
+        "success": True,
+        "topic": request.topic,
+        "complexity": request.complexity,
+        "explanation": explanation,
+        "tokens_used": tokens_used,
+        "model": "GPT-4o-mini",
+        "cost": f"${billed_tokens * upstream.COST_PER_TOKEN:.6f}",
+        "cached": cached,
+        "coalesced": coalesced,
+        "stale": stale
+    }
+
+
+@app.get("/admin/cache/stats", dependencies=[Depends(require_admin)])
+async def cache_stats():
+    """Counters only: cheap enough to poll every few seconds."""
+    cache = app.state.cache
+    cache_stats = cache.stats()
+    tiers = cache_stats.pop("tiers", None) or {cache.name: cache_stats}
+    requests = app.state.metrics.stats()
+    # Resident entries and bytes per level come from the in-process tier.
+    resident = next((tier["levels"] for tier in tiers.values() if "levels" in tier), {})
+    for level, counters in requests["levels"].items():
+        counters.update(resident.get(level, {"entries": 0, "bytes": 0, "evictions": 0}))
+    return {
+        "tiers": tiers,
+        **cache_stats,
+        "levels": requests["levels"],
+        "total": requests["total"],
+        "coalescing": app.state.singleflight.stats(),
+        "prompt_cache": app.state.prompt_cache.stats(),
+        "cancellation": app.state.cancellations.stats(),
+        "semantic_cache": app.state.semantic.stats() if app.state.semantic else None,
+    }
+
+
+@app.get("/admin/cache/export", dependencies=[Depends(require_admin)])
+async def export_cache():
+    fd, path = tempfile.mkstemp(suffix=".snap")
+    os.close(fd)
+    try:
+        count = await export_snapshot(app.state.cache, path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename="eli5-cache.snap",
+        headers={"X-Snapshot-Entries": str(count)},
+        background=BackgroundTask(os.unlink, path)
+    )
+
+
+@app.post("/admin/cache/import", dependencies=[Depends(require_admin)])
+async def import_cache(request: Request):
+    fd, path = tempfile.mkstemp(suffix=".snap")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                f.write(chunk)
+        return await import_snapshot(app.state.cache, path)
+    except SnapshotError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error: {str(e)}"
+        )
+    finally:
+        os.unlink(path)
 
 
 if __name__ == "__main__":
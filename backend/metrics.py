@@ -0,0 +1,194 @@
+from collections import deque
+
+OUTCOMES = ("hit", "stale", "coalesced", "miss")
+
+
+class CacheMetrics:
+    """Per-complexity outcomes of explanation requests.
+
+    Every request is recorded as a fresh cache ``hit``, a ``stale`` hit, a
+    ``coalesced`` follower of another request's upstream call, or a ``miss``
+    that paid for one. Counters are plain ints bumped on the event loop, so
+    reading them takes no lock and costs the same whatever the traffic.
+    """
+
+    def __init__(self, levels, cost_per_token):
+        self.cost_per_token = cost_per_token
+        self._levels = {
+            level: dict.fromkeys(OUTCOMES + ("tokens_saved", "tokens_spent"), 0)
+            for level in levels
+        }
+
+    def record(self, level, outcome, tokens_used):
+        counters = self._levels[level]
+        counters[outcome] += 1
+        if outcome == "miss":
+            counters["tokens_spent"] += tokens_used
+        else:
+            counters["tokens_saved"] += tokens_used
+
+    def _summary(self, counters):
+        requests = sum(counters[outcome] for outcome in OUTCOMES)
+        hits = counters["hit"] + counters["stale"]
+        return {
+            "requests": requests,
+            "hits": hits,
+            "stale_hits": counters["stale"],
+            "coalesced": counters["coalesced"],
+            "misses": counters["miss"],
+            "hit_ratio": round(hits / requests, 4) if requests else 0.0,
+            "tokens_saved": counters["tokens_saved"],
+            "dollars_saved": round(counters["tokens_saved"] * self.cost_per_token, 6),
+            "tokens_spent": counters["tokens_spent"],
+            "dollars_spent": round(counters["tokens_spent"] * self.cost_per_token, 6),
+        }
+
+    def stats(self):
+        total = dict.fromkeys(OUTCOMES + ("tokens_saved", "tokens_spent"), 0)
+        for counters in self._levels.values():
+            for name, value in counters.items():
+                total[name] += value
+        return {
+            "levels": {level: self._summary(counters) for level, counters in self._levels.items()},
+            "total": self._summary(total),
+        }
+
+
+class PromptCacheMetrics:
+    """Per-level upstream calls and how much of their prompts the provider cached.
+
+    Calls with and without cached prompt tokens are timed separately, so the
+    latency gain of a stable prompt prefix shows up next to the cost gain.
+    """
+
+    def __init__(self, levels, cost_per_token, cached_discount):
+        self.cost_per_token = cost_per_token
+        self.cached_discount = cached_discount
+        self._levels = {level: self._counters() for level in levels}
+
+    @staticmethod
+    def _counters():
+        return dict.fromkeys(
+            ("calls", "cache_hits", "prompt_tokens", "cached_tokens", "seconds", "cached_seconds"), 0
+        )
+
+    def record(self, level, prompt_tokens, cached_tokens, seconds):
+        counters = self._levels.setdefault(level, self._counters())
+        counters["calls"] += 1
+        counters["prompt_tokens"] += prompt_tokens
+        counters["cached_tokens"] += cached_tokens
+        counters["seconds"] += seconds
+        if cached_tokens:
+            counters["cache_hits"] += 1
+            counters["cached_seconds"] += seconds
+
+    def _summary(self, counters):
+        calls, hits = counters["calls"], counters["cache_hits"]
+        misses = calls - hits
+        saved = counters["cached_tokens"] * self.cost_per_token * (1 - self.cached_discount)
+        return {
+            "calls": calls,
+            "prompt_tokens": counters["prompt_tokens"],
+            "cached_tokens": counters["cached_tokens"],
+            "cached_ratio": (
+                round(counters["cached_tokens"] / counters["prompt_tokens"], 4)
+                if counters["prompt_tokens"] else 0.0
+            ),
+            "calls_with_cached_prefix": hits,
+            "avg_seconds_cached": round(counters["cached_seconds"] / hits, 3) if hits else None,
+            "avg_seconds_uncached": (
+                round((counters["seconds"] - counters["cached_seconds"]) / misses, 3)
+                if misses else None
+            ),
+            "dollars_saved": round(saved, 6),
+        }
+
+    def stats(self):
+        total = self._counters()
+        for counters in self._levels.values():
+            for name, value in counters.items():
+                total[name] += value
+        return {
+            "levels": {level: self._summary(counters) for level, counters in self._levels.items()},
+            "total": self._summary(total),
+        }
+
+
+class StreamMetrics:
+    """Time to first token and total duration of streamed explanations.
+
+    Percentiles are taken over the last ``window`` streams of each kind, so
+    the numbers follow current behaviour rather than the whole uptime.
+    """
+
+    def __init__(self, window=1_000):
+        self.streams = 0
+        self.cached = 0
+        self.failed = 0
+        self._ttft = deque(maxlen=window)
+        self._duration = deque(maxlen=window)
+
+    def record(self, ttft, duration, cached=False):
+        self.streams += 1
+        if cached:
+            self.cached += 1
+        if ttft is not None:
+            self._ttft.append(ttft)
+        self._duration.append(duration)
+
+    def record_failure(self):
+        self.failed += 1
+
+    @staticmethod
+    def _percentiles(samples):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+
+        def pick(q):
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1)
+
+        return {"p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(ordered[-1] * 1000, 1)}
+
+    def stats(self):
+        return {
+            "streams": self.streams,
+            "cached": self.cached,
+            "failed": self.failed,
+            "time_to_first_token": self._percentiles(self._ttft),
+            "duration": self._percentiles(self._duration),
+        }
+
+
+class CancellationMetrics:
+    """Upstream generations cancelled because every client waiting on them left.
+
+    ``tokens_avoided`` counts the completion budget (``max_tokens``) the
+    cancelled calls had left, less what a stream had already produced; it
+    is an upper bound on what was saved, since answers often end early.
+    """
+
+    def __init__(self, cost_per_token):
+        self.cost_per_token = cost_per_token
+        self.disconnects = 0
+        self.cancelled = 0
+        self.streams_cancelled = 0
+        self.tokens_avoided = 0
+
+    def record_disconnect(self):
+        self.disconnects += 1
+
+    def record(self, tokens_avoided, streaming=False):
+        self.cancelled += 1
+        if streaming:
+            self.streams_cancelled += 1
+        self.tokens_avoided += tokens_avoided
+
+    def stats(self):
+        return {
+            "client_disconnects": self.disconnects,
+            "upstream_cancelled": self.cancelled,
+            "streams_cancelled": self.streams_cancelled,
+            "tokens_avoided": self.tokens_avoided,
+            "dollars_avoided": round(self.tokens_avoided * self.cost_per_token, 6),
+        }
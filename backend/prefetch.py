@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import prompts
+from cache import make_key
+from warmer import PROMPT_TOKEN_ESTIMATE
+
+
+def neighbours(level, levels=None):
+    """The levels either side of ``level`` in ``complexity_configs`` order."""
+    levels = list(levels or prompts.complexity_configs)
+    i = levels.index(level)
+    return levels[max(i - 1, 0):i] + levels[i + 1:i + 2]
+
+
+class Prefetcher:
+    """Generates the neighbouring levels of what was just served, speculatively.
+
+    Someone reading ``eli10`` often clicks ``teen`` next; if that answer is
+    already cached the second click costs milliseconds. Jobs are queued at
+    background priority and dropped rather than delayed: when the queue is
+    full, when more than ``busy_threshold`` live upstream calls are in flight,
+    or when they would take the last minute's spend past
+    ``tokens_per_minute``.
+    """
+
+    def __init__(self, cache, generate, tokens_per_minute=5_000, concurrency=1,
+                 queue_size=100, inflight=None, busy_threshold=4):
+        self.cache = cache
+        self.generate = generate
+        self.tokens_per_minute = tokens_per_minute
+        self.concurrency = concurrency
+        self.inflight = inflight or (lambda: 0)
+        self.busy_threshold = busy_threshold
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._queued = set()
+        self._workers = []
+        self._active = 0
+        self._window_start = 0.0
+        self._window_tokens = 0
+        self.scheduled = 0
+        self.prefetched = 0
+        self.already_cached = 0
+        self.skipped_busy = 0
+        self.skipped_budget = 0
+        self.dropped = 0
+        self.failed = 0
+        self.tokens_spent = 0
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def busy(self):
+        return self.inflight() - self._active > self.busy_threshold
+
+    def schedule(self, level, topic):
+        """Queue the neighbours of ``level`` for ``topic``; never blocks."""
+        if self.busy():
+            self.skipped_busy += 1
+            return
+        for neighbour in neighbours(level):
+            key = make_key(topic, neighbour)
+            if key in self._queued:
+                continue
+            try:
+                self._queue.put_nowait((key, neighbour, topic))
+            except asyncio.QueueFull:
+                self.dropped += 1
+                return
+            self._queued.add(key)
+            self.scheduled += 1
+
+    def _reserve(self, tokens):
+        now = time.monotonic()
+        if now - self._window_start >= 60:
+            self._window_start = now
+            self._window_tokens = 0
+        if self._window_tokens + tokens > self.tokens_per_minute:
+            return False
+        self._window_tokens += tokens
+        return True
+
+    async def _worker(self):
+        while True:
+            key, level, topic = await self._queue.get()
+            try:
+                await self._prefetch(key, level, topic)
+            except Exception:
+                self.failed += 1
+            finally:
+                self._queued.discard(key)
+
+    async def _prefetch(self, key, level, topic):
+        entry = await self.cache.get(key)
+        if entry is not None and not entry.is_expired():
+            self.already_cached += 1
+            return
+        if self.busy():
+            self.skipped_busy += 1
+            return
+        reserve = prompts.complexity_configs[level]["max_tokens"] + PROMPT_TOKEN_ESTIMATE
+        if not self._reserve(reserve):
+            self.skipped_budget += 1
+            return
+        self._active += 1
+        try:
+            result, _ = await self.generate(key, level, topic)
+        finally:
+            self._active -= 1
+        # Settle the reservation against what the call really cost.
+        self._window_tokens = max(0, self._window_tokens + result["tokens_used"] - reserve)
+        self.tokens_spent += result["tokens_used"]
+        self.prefetched += 1
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "scheduled": self.scheduled,
+            "prefetched": self.prefetched,
+            "already_cached": self.already_cached,
+            "skipped_busy": self.skipped_busy,
+            "skipped_budget": self.skipped_budget,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "tokens_spent": self.tokens_spent,
+            "tokens_per_minute": self.tokens_per_minute,
+        }
@@ -0,0 +1,106 @@
+import functools
+import hashlib
+import json
+
+SYSTEM_PROMPT = "You are a concise AI tutor. Keep explanations SHORT and TO THE POINT. Always break longer answers into short paragraphs for readability. No fluff or unnecessary details."
+
+DEFAULT_COMPLEXITY = "eli5"
+
+complexity_configs = {
+    "eli5": {
+        "instruction": "Explain in 5-10 sentences using simple words a 5-year-old would understand. Use a fun analogy.",
+        "max_tokens": 200,
+        "temperature": 0.7
+    },
+    "eli10": {
+        "instruction": "Explain in 3-4 sentences for a 10-year-old. Use clear, relatable examples. Break into 2 short paragraphs.",
+        "max_tokens": 200,
+        "temperature": 0.7
+    },
+    "teen": {
+        "instruction": "Explain in 4-5 sentences for a teenager. Include some detail but keep it interesting. Use 2 paragraphs.",
+        "max_tokens": 250,
+        "temperature": 0.7
+    },
+    "college": {
+        "instruction": "Provide a concise college-level explanation in 5-6 sentences. Use proper terminology. Structure in 2-3 short paragraphs.",
+        "max_tokens": 300,
+        "temperature": 0.6
+    },
+    "expert": {
+        "instruction": "Provide an expert-level technical explanation using advanced terminology, academic language, and field-specific jargon. Be precise and sophisticated. 3 paragraphs max. Sound impressive and authoritative.",
+        "max_tokens": 350,
+        "temperature": 0.5
+    }
+}
+
+
+def resolve_level(complexity):
+    """Map a requested complexity to the level whose config is actually used."""
+    return complexity if complexity in complexity_configs else DEFAULT_COMPLEXITY
+
+
+# Everything but the topic goes first, so calls for the same level share a
+# byte-identical prefix the provider can cache. Keep the topic last.
+FORMAT_RULES = "Be concise and clear. Use paragraph breaks for readability."
+
+
+def build_messages(level, topic):
+    config = complexity_configs[level]
+    return [
+        {
+            "role": "system",
+            "content": f"{SYSTEM_PROMPT}\n\n{config['instruction']}\n\n{FORMAT_RULES}"
+        },
+        {
+            "role": "user",
+            "content": f"Topic: {topic}"
+        }
+    ]
+
+
+def build_all_messages(levels, topic):
+    """One JSON-mode request asking for ``topic`` at every level in ``levels``."""
+    instructions = "\n".join(
+        f"- {level}: {complexity_configs[level]['instruction']}" for level in levels
+    )
+    return [
+        {
+            "role": "system",
+            "content": (
+                f"{SYSTEM_PROMPT}\n\n"
+                "Explain the topic once for each audience below, following that audience's instructions.\n\n"
+                f"{instructions}\n\n"
+                "Return a JSON object with one key per audience, each value being that explanation "
+                "as plain text with paragraph breaks.\n"
+                f"Keys: {', '.join(levels)}\n\n"
+                f"{FORMAT_RULES}"
+            )
+        },
+        {
+            "role": "user",
+            "content": f"Topic: {topic}"
+        }
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def prompt_version(level):
+    """Short hash of everything that shapes the answer for ``level``.
+
+    Cached explanations are keyed on it, so editing a level's instruction,
+    token limit or temperature, the system prompt or the message template
+    stops old answers from being served for that level only. Configs are
+    fixed for the life of the process, so each level is hashed once.
+    """
+    effective = {
+        "messages": build_messages(level, "{topic}"),
+        "config": complexity_configs[level],
+    }
+    payload = json.dumps(effective, sort_keys=True).encode()
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def prompt_versions():
+    """Current ``{level: prompt_version}`` for every level."""
+    return {level: prompt_version(level) for level in complexity_configs}
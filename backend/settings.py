@@ -0,0 +1,22 @@
+import os
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def env_bool(name, default=False):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_str(name, default=""):
+    return os.getenv(name) or default
@@ -0,0 +1,80 @@
+import asyncio
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one upstream call.
+
+    The first caller for a key starts the work as a task; anyone arriving
+    while it is still running awaits the same task and gets the same result
+    (or the same exception). Callers are counted: when the last one waiting
+    on a call is cancelled (its client disconnected), the call is cancelled
+    too, so nobody pays for an answer no one will read.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._waiters = {}
+        self.leaders = 0
+        self.followers = 0
+        self.tokens_saved = 0
+        self.cancelled = 0
+
+    async def do(self, key, fn):
+        """Run ``fn()`` for ``key`` unless it is already running.
+
+        Returns ``(result, coalesced)`` where ``coalesced`` is True when the
+        result was shared from another caller's call.
+        """
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self.followers += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        # shield() keeps one caller's cancellation from cancelling the
+        # shared call for everyone else waiting on it; the last one out
+        # cancels it explicitly.
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        abandoned = False
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            abandoned = True
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if abandoned and not task.done():
+                    # Forget it now, not when it finishes unwinding, so a
+                    # new caller starts a fresh call instead of joining one
+                    # that is being cancelled.
+                    self._forget(key, task)
+                    task.cancel()
+                    self.cancelled += 1
+        if coalesced:
+            self.tokens_saved += result.get("tokens_used", 0)
+        return result, coalesced
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def inflight(self):
+        return len(self._inflight)
+
+    def stats(self):
+        total = self.leaders + self.followers
+        return {
+            "requests": total,
+            "upstream_calls": self.leaders,
+            "coalesced": self.followers,
+            "coalescing_ratio": round(self.followers / total, 4) if total else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "in_flight": len(self._inflight),
+            "cancelled": self.cancelled,
+        }
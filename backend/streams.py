@@ -0,0 +1,204 @@
+import asyncio
+import secrets
+import time
+from collections import OrderedDict
+
+
+class StreamBuffer:
+    """Every event of one streamed explanation, kept so clients can replay it.
+
+    Events are numbered from 1. A producer task appends them while any
+    number of readers :meth:`follow` along; a reader that reconnects picks
+    up after the last number it saw. At most ``max_events`` are kept; a
+    reader that fell further behind than that cannot be resumed.
+
+    When the last reader leaves a live stream, the producer is cancelled
+    after ``idle_grace`` seconds unless someone reconnects or joins first.
+    """
+
+    def __init__(self, stream_id, key, max_events=4_096, idle_grace=5.0):
+        self.id = stream_id
+        self.key = key
+        self.max_events = max_events
+        self.idle_grace = idle_grace
+        self.abandoned = False
+        self._idle_timer = None
+        self.events = []
+        self.offset = 0
+        self.done = False
+        self.created_at = time.time()
+        self.finished_at = None
+        self.task = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def last_index(self):
+        return self.offset + len(self.events)
+
+    def append(self, event, data):
+        self.events.append((event, data))
+        if len(self.events) > self.max_events:
+            del self.events[0]
+            self.offset += 1
+        self._wake()
+
+    def finish(self):
+        self.done = True
+        self.finished_at = time.time()
+        self._wake()
+
+    def _wake(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def can_resume(self, after):
+        return self.offset <= after <= self.last_index
+
+    async def follow(self, after=0):
+        """Yield ``(index, event, data)`` after ``after``, live until the stream ends.
+
+        The producer never waits for readers: each reader walks the shared
+        event list at its own pace. One that has fallen behind gets its
+        backlog of ``token`` events merged into a single event (with the
+        last one's index), so a slow connection catches up in a few large
+        writes instead of many small ones.
+        """
+        self.subscribers += 1
+        if self._idle_timer:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+        try:
+            while True:
+                changed = self._changed
+                while after < self.last_index:
+                    if after < self.offset:
+                        yield self.offset, "error", {"detail": "Stream moved on too far to catch up"}
+                        return
+                    index, event, data = self._next(after)
+                    after = index
+                    yield index, event, data
+                if self.done:
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and not self.done and self.task:
+                self._idle_timer = asyncio.get_running_loop().call_later(
+                    self.idle_grace, self._abandon
+                )
+
+    def _abandon(self):
+        self._idle_timer = None
+        if not self.subscribers and not self.done:
+            self.abandoned = True
+            self.task.cancel()
+
+    def _next(self, after):
+        position = after - self.offset
+        event, data = self.events[position]
+        if event != "token":
+            return after + 1, event, data
+        pieces = [data["text"]]
+        while position + 1 < len(self.events) and self.events[position + 1][0] == "token":
+            position += 1
+            pieces.append(self.events[position][1]["text"])
+        return self.offset + position + 1, "token", {"text": "".join(pieces)}
+
+
+class StreamRegistry:
+    """Live and recently finished streams by ID, for ``Last-Event-ID`` resumes.
+
+    A stream's producer runs as its own task, so the upstream generation
+    carries on when a client drops. Finished streams stay replayable for
+    ``replay_seconds``; beyond ``max_streams`` the oldest finished ones go.
+
+    Live streams are also indexed by cache key, so a second request for the
+    same topic and level joins the running generation: it is sent
+    everything emitted so far, then the live tail, from one upstream call.
+    A stream nobody is reading is cancelled after ``idle_grace`` seconds.
+    """
+
+    def __init__(self, replay_seconds=60.0, max_events=4_096, max_streams=1_000, idle_grace=5.0):
+        self.replay_seconds = replay_seconds
+        self.max_events = max_events
+        self.max_streams = max_streams
+        self.idle_grace = idle_grace
+        self._streams = OrderedDict()
+        self._live = {}
+        self.started = 0
+        self.resumed = 0
+        self.joined = 0
+
+    def start(self, key, produce):
+        """Register a new stream and run ``produce(buffer)`` to fill it."""
+        self._purge()
+        buffer = StreamBuffer(secrets.token_urlsafe(12), key, self.max_events, self.idle_grace)
+        self._streams[buffer.id] = buffer
+        self._live[key] = buffer
+        buffer.task = asyncio.create_task(self._run(buffer, produce))
+        self.started += 1
+        return buffer
+
+    async def _run(self, buffer, produce):
+        try:
+            await produce(buffer)
+        finally:
+            if self._live.get(buffer.key) is buffer:
+                del self._live[buffer.key]
+            buffer.finish()
+
+    def join(self, key):
+        """The live stream generating ``key``, if there is one."""
+        buffer = self._live.get(key)
+        if buffer is None or buffer.done or buffer.abandoned:
+            return None
+        self.joined += 1
+        return buffer
+
+    def resume(self, last_event_id, key):
+        """``(buffer, after, joined)`` for an event ID, if still replayable.
+
+        IDs are ``"<stream id>:<index>"``, with a ``":j"`` suffix for readers
+        that joined a generation someone else started.
+        """
+        stream_id, _, rest = (last_event_id or "").partition(":")
+        index, _, flag = rest.partition(":")
+        buffer = self._streams.get(stream_id)
+        if buffer is None or buffer.key != key or buffer.abandoned or not index.isdigit():
+            return None
+        if self._expired(buffer, time.time()) or not buffer.can_resume(int(index)):
+            return None
+        self.resumed += 1
+        return buffer, int(index), flag == "j"
+
+    def _expired(self, buffer, now):
+        return buffer.done and now - buffer.finished_at > self.replay_seconds
+
+    def _purge(self):
+        now = time.time()
+        for stream_id, buffer in list(self._streams.items()):
+            if self._expired(buffer, now):
+                del self._streams[stream_id]
+        finished = [stream_id for stream_id, buffer in self._streams.items() if buffer.done]
+        for stream_id in finished[:max(0, len(self._streams) - self.max_streams)]:
+            del self._streams[stream_id]
+
+    async def close(self):
+        tasks = [buffer.task for buffer in self._streams.values() if buffer.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        live = [buffer for buffer in self._streams.values() if not buffer.done]
+        return {
+            "live": len(live),
+            "subscribers": sum(buffer.subscribers for buffer in live),
+            "replayable": len(self._streams) - len(live),
+            "started": self.started,
+            "joined": self.joined,
+            "resumed": self.resumed,
+            "abandoned": sum(1 for buffer in self._streams.values() if buffer.abandoned),
+            "replay_seconds": self.replay_seconds,
+        }
@@ -0,0 +1,187 @@
+import json
+
+import httpx
+from openai import AsyncOpenAI
+from openai.types import CompletionUsage
+
+import prompts
+from settings import env_bool, env_float, env_int
+
+MODEL = "gpt-4o-mini"
+COST_PER_TOKEN = 0.0000015
+# Share of the input price OpenAI charges for prompt tokens served from its
+# prompt cache.
+CACHED_PROMPT_DISCOUNT = 0.5
+
+# Connection pool settings for the OpenAI transport. Every request in the
+# process shares these connections, so a burst reuses warm TLS sessions
+# instead of opening a new one per explanation.
+MAX_CONNECTIONS = env_int("OPENAI_MAX_CONNECTIONS", 200)
+MAX_KEEPALIVE_CONNECTIONS = env_int("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 100)
+KEEPALIVE_EXPIRY = env_float("OPENAI_KEEPALIVE_EXPIRY", 60.0)
+CONNECT_TIMEOUT = env_float("OPENAI_CONNECT_TIMEOUT", 5.0)
+REQUEST_TIMEOUT = env_float("OPENAI_REQUEST_TIMEOUT", 60.0)
+HTTP2 = env_bool("OPENAI_HTTP2")
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client():
+    http2 = HTTP2
+    if http2 and not _http2_available():
+        print("⚠️  Warning: OPENAI_HTTP2 is set but the 'h2' package is missing, using HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def create_openai_client(api_key, http_client):
+    return AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+
+def pool_stats(http_client):
+    """Configured limits plus live pool counts.
+
+    The counts come from httpcore internals; if those change shape they are
+    reported as None rather than breaking /health.
+    """
+    stats = {
+        "max_connections": MAX_CONNECTIONS,
+        "max_keepalive_connections": MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry": KEEPALIVE_EXPIRY,
+        "http2": None,
+        "connections": None,
+        "idle_connections": None,
+        "active_connections": None,
+        "queued_requests": None,
+    }
+    try:
+        pool = http_client._transport._pool
+        connections = list(pool.connections)
+        requests = list(pool._requests)
+        idle = sum(1 for connection in connections if connection.is_idle())
+        stats.update(
+            http2=pool._http2,
+            connections=len(connections),
+            idle_connections=idle,
+            active_connections=len(connections) - idle,
+            queued_requests=sum(1 for request in requests if request.is_queued()),
+        )
+    except AttributeError:
+        pass
+    return stats
+
+
+async def explain(client, level, topic):
+    config = prompts.complexity_configs[level]
+    response = await client.chat.completions.create(
+        model=MODEL,
+        messages=prompts.build_messages(level, topic),
+        max_tokens=config["max_tokens"],
+        temperature=config["temperature"]
+    )
+    return {
+        "explanation": response.choices[0].message.content.strip(),
+        "tokens_used": response.usage.total_tokens,
+        "prompt_tokens": response.usage.prompt_tokens,
+        "cached_tokens": cached_tokens(response.usage)
+    }
+
+
+async def stream_explain(client, level, topic):
+    """Stream an explanation as ``("token", text)`` items, then ``("usage", dict)``.
+
+    The usage dict has the same ``tokens_used``/``prompt_tokens``/
+    ``cached_tokens`` keys as :func:`explain`. ``stream_options`` goes through
+    ``extra_body`` because the pinned client predates it; if the API sends no
+    usage chunk the tokens are estimated from the text.
+    """
+    config = prompts.complexity_configs[level]
+    messages = prompts.build_messages(level, topic)
+    stream = await client.chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        max_tokens=config["max_tokens"],
+        temperature=config["temperature"],
+        stream=True,
+        extra_body={"stream_options": {"include_usage": True}}
+    )
+    usage, chunks = None, 0
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            chunks += 1
+            yield "token", chunk.choices[0].delta.content
+        usage = getattr(chunk, "usage", None) or usage
+    if isinstance(usage, dict):
+        usage = CompletionUsage(**usage)
+    if usage is None:
+        # Roughly four characters per prompt token and one token per chunk.
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        usage = CompletionUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=chunks,
+            total_tokens=prompt_tokens + chunks
+        )
+    yield "usage", {
+        "tokens_used": usage.total_tokens,
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_tokens": cached_tokens(usage)
+    }
+
+
+def cached_tokens(usage):
+    """Prompt tokens the provider served from its prompt cache (0 if unreported).
+
+    Older client versions keep ``prompt_tokens_details`` as a plain dict.
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+async def explain_all(client, levels, topic):
+    """Explain ``topic`` at every level in ``levels`` with one JSON-mode call.
+
+    Returns ``{"explanations": {level: text}, "tokens_used": n}``. Levels the
+    model left out (or lost to a truncated reply) are missing from
+    ``explanations`` and up to the caller to fetch on their own.
+    """
+    configs = [prompts.complexity_configs[level] for level in levels]
+    response = await client.chat.completions.create(
+        model=MODEL,
+        messages=prompts.build_all_messages(levels, topic),
+        # Every level's own budget plus a little for the JSON around them.
+        max_tokens=sum(config["max_tokens"] for config in configs) + 20 * len(levels),
+        temperature=min(config["temperature"] for config in configs),
+        response_format={"type": "json_object"}
+    )
+    try:
+        data = json.loads(response.choices[0].message.content)
+    except (TypeError, ValueError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    explanations = {
+        level: data[level].strip()
+        for level in levels
+        if isinstance(data.get(level), str) and data[level].strip()
+    }
+    return {
+        "explanations": explanations,
+        "tokens_used": response.usage.total_tokens,
+        "prompt_tokens": response.usage.prompt_tokens,
+        "cached_tokens": cached_tokens(response.usage)
+    }
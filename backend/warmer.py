@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import prompts
+from cache import make_key
+
+# Upper bound on the prompt side of one explanation (system prompt, level
+# instruction and topic), used to reserve budget before a call is made.
+PROMPT_TOKEN_ESTIMATE = 150
+
+
+def load_topics(path, top_n=0):
+    """Read a topic list: one topic per line, optionally "topic<TAB>count".
+
+    Counted topics are ranked by count; the first occurrence of each
+    normalized topic wins, and ``top_n`` (if set) keeps only the most popular.
+    """
+    ranked = []
+    with open(path, encoding="utf-8") as f:
+        for position, line in enumerate(f):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            topic, _, count = line.partition("\t")
+            try:
+                count = int(count or 0)
+            except ValueError:
+                raise ValueError(f"{path}:{position + 1}: count is not a number: {count!r}") from None
+            ranked.append((-count, position, topic.strip()))
+    ranked.sort()
+
+    topics, seen = [], set()
+    for _, _, topic in ranked:
+        key = make_key(topic, prompts.DEFAULT_COMPLEXITY)
+        if key not in seen:
+            seen.add(key)
+            topics.append(topic)
+    return topics[:top_n] if top_n else topics
+
+
+class CacheWarmer:
+    """Fills the explanation cache for popular topics in the background.
+
+    Runs once shortly after startup and then every ``interval`` seconds (if
+    set). It never blocks startup, uses at most ``concurrency`` upstream
+    calls at a time, pauses while more than ``busy_threshold`` live upstream
+    calls are in flight, and stops a run before it could spend more than
+    ``max_tokens``.
+    """
+
+    def __init__(self, cache, generate, topics, levels, concurrency=2, max_tokens=20_000,
+                 interval=0, start_delay=5.0, inflight=None, busy_threshold=4):
+        self.cache = cache
+        self.generate = generate
+        self.topics = topics
+        self.levels = levels
+        self.concurrency = concurrency
+        self.max_tokens = max_tokens
+        self.interval = interval
+        self.start_delay = start_delay
+        self.inflight = inflight or (lambda: 0)
+        self.busy_threshold = busy_threshold
+        self._active = 0
+        self._task = None
+        self.runs = 0
+        self.warmed = 0
+        self.already_cached = 0
+        self.failed = 0
+        self.tokens_spent = 0
+        self.budget_exhausted = False
+        self.last_run_at = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        await asyncio.sleep(self.start_delay)
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                print(f"⚠️  Warning: cache warm-up failed: {e}")
+            if not self.interval:
+                return
+            await asyncio.sleep(self.interval)
+
+    async def run(self):
+        """Generate every missing or expired (topic, level) pair, within budget."""
+        self.runs += 1
+        self.last_run_at = time.time()
+        self.budget_exhausted = False
+        jobs = [(make_key(topic, level), level, topic) for level in self.levels for topic in self.topics]
+        present = await self.cache.get_many([key for key, _, _ in jobs])
+        fresh = {key for key, entry in present.items() if not entry.is_expired()}
+        self.already_cached += len(fresh)
+        queue = asyncio.Queue()
+        for job in jobs:
+            if job[0] not in fresh:
+                queue.put_nowait(job)
+
+        budget = {"reserved": 0, "spent": 0}
+        workers = [asyncio.create_task(self._worker(queue, budget)) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        self.tokens_spent += budget["spent"]
+
+    def busy(self):
+        return self.inflight() - self._active > self.busy_threshold
+
+    async def _worker(self, queue, budget):
+        while not queue.empty():
+            # Live requests come first: wait while the app is busy.
+            while self.busy():
+                await asyncio.sleep(0.5)
+
+            try:
+                key, level, topic = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                # Another worker took the last job while this one waited.
+                return
+            reserve = prompts.complexity_configs[level]["max_tokens"] + PROMPT_TOKEN_ESTIMATE
+            if budget["spent"] + budget["reserved"] + reserve > self.max_tokens:
+                self.budget_exhausted = True
+                return
+            budget["reserved"] += reserve
+            self._active += 1
+            try:
+                result, _ = await self.generate(key, level, topic)
+                budget["spent"] += result["tokens_used"]
+                self.warmed += 1
+            except Exception:
+                self.failed += 1
+            finally:
+                self._active -= 1
+                budget["reserved"] -= reserve
+
+    def stats(self):
+        return {
+            "topics": len(self.topics),
+            "levels": self.levels,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "warmed": self.warmed,
+            "already_cached": self.already_cached,
+            "failed": self.failed,
+            "tokens_spent": self.tokens_spent,
+            "max_tokens_per_run": self.max_tokens,
+            "budget_exhausted": self.budget_exhausted,
+        }